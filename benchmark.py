@@ -0,0 +1,337 @@
+#!/usr/bin/python
+from argparse import ArgumentParser
+from collections import Counter
+from json import dumps
+from os import listdir
+from os.path import abspath, dirname
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import monotonic
+import sys
+
+from davinci import DaVinciResolve
+from distributed import RenderCoordinator
+from engine import BatchEngine
+from fakeresolve import FakeMuxer, FakePlanner, FakeScriptModule, createFakeBin
+from scheduler import MuxScheduler
+from tracing import Tracer
+
+
+ENGINE_MODES = {
+    'sequential': {},
+    'single': {
+        'singleJobRender': True
+    },
+    'batch': {
+        'batchRender': True
+    },
+    'batchSingle': {
+        'batchRender': True,
+        'singleJobRender': True
+    },
+    'reuse': {
+        'reuseTimeline': True,
+        'singleJobRender': True
+    },
+    'videoOnce': {
+        'renderVideoOnce': True
+    }
+}
+
+
+def openFakeBin(tracks, latency=0, renderFps=1000000):
+    """
+    :return: fake backend with one bin of tracks, and a DaVinciResolve with
+    the bin selected
+    """
+    backend = FakeScriptModule(latency=latency, renderFps=renderFps)
+    createFakeBin(backend, tracks=tracks)
+    resolve = DaVinciResolve(scriptModule=backend)
+    resolve.loadProject('Benchmark')
+    resolve.setCurrentFolder(resolve.getRootFolders()[0])
+
+    return backend, resolve
+
+
+def benchmarkEngine(tracks, mode='sequential', latency=0, renderFps=1000000):
+    """
+    Process a fake bin end to end and measure throughput and API usage, with
+    the audio lengths planned up front and muxes that do no work
+    :param tracks: audio files in the bin
+    :param mode: key of ENGINE_MODES, the BatchEngine options to measure
+    :param latency: seconds every fake API call takes
+    :param renderFps: frames rendered per second by the fake render engine
+    """
+    backend, resolve = openFakeBin(tracks, latency, renderFps)
+    events = []
+
+    with TemporaryDirectory() as outputPath:
+        engine = BatchEngine(resolve,
+                             outputPath=outputPath,
+                             useJournal=False,
+                             tracer=Tracer(),
+                             minPollInterval=0.01,
+                             maxPollInterval=0.1,
+                             planner=FakePlanner(backend),
+                             muxer=FakeMuxer(backend),
+                             onEvent=events.append,
+                             **ENGINE_MODES[mode])
+        started = monotonic()
+        engine.run()
+        seconds = monotonic() - started
+
+    stages = next(event['stages'] for event in events
+                  if event['type'] == 'summary')
+    renderSeconds = sum(
+        stages.get(stage, {}).get('seconds', 0)
+        for stage in ('renderWait', 'loopRender'))
+
+    return {
+        'benchmark': mode,
+        'tracks': tracks,
+        'seconds': seconds,
+        'tracksPerSecond': tracks / seconds,
+        'apiCalls': backend.apiCalls,
+        'apiCallsPerTrack': backend.apiCalls / tracks,
+        'overheadSeconds': seconds - renderSeconds
+    }
+
+
+def checkOutputs(outputPath, trackNames, events):
+    """
+    :return: problems of a finished run: failed or repeated tracks, missing
+    outputs and temporary files left in the output folder
+    """
+    problems = [
+        f'{event["trackName"]} failed {event.get("message", "")}'.strip()
+        for event in events if event['type'] == 'trackFailed'
+    ]
+    problems.extend(f'worker {event["worker"]} lost: {event["message"]}'
+                    for event in events if event['type'] == 'workerLost')
+    done = Counter(event['trackName'] for event in events
+                   if event['type'] in ('trackMuxed', 'trackRendered'))
+    problems.extend(f'{trackName} done {done[trackName]} times'
+                    for trackName in trackNames if done[trackName] != 1)
+    outputs = set(listdir(outputPath))
+    problems.extend(
+        f'{trackName} has no output' for trackName in trackNames
+        if not {f'{trackName}.mp4', f'{trackName}.mov'} & outputs)
+    problems.extend(f'{fileName} left in the output folder'
+                    for fileName in sorted(outputs)
+                    if fileName.endswith(('VIDEO.mov', 'AUDIO.mov', '.mov'))
+                    and fileName[:-4] not in trackNames)
+
+    return problems
+
+
+def checkBinIsClean(backend, clipNames):
+    """
+    :return: problems of the bin after a run: timelines or compound clips the
+    run left behind
+    """
+    folder = backend.app.projectManager.projects['Benchmark'].mediaPool
+    left = [
+        clip.name for clip in folder.rootFolder.subFolders[0].clips
+        if clip.name not in clipNames
+    ]
+
+    return [f'{len(left)} clip(s) left in the bin: {left}'] if left else []
+
+
+def checkEngine(mode, tracks=12):
+    """
+    Run every track of a fake bin through one engine, with the journal on
+    :return: problems found, empty when the run went through
+    """
+    backend, resolve = openFakeBin(tracks, renderFps=100000)
+    clipNames = [clip.name for clip in resolve.getFolderContent()[
+        'audioClips'] + resolve.clipsInFolder['videoClips']]
+    trackNames = [clipName[:-4] for clipName in clipNames[:tracks]]
+    events = []
+
+    with TemporaryDirectory() as outputPath:
+        BatchEngine(resolve,
+                    outputPath=outputPath,
+                    minPollInterval=0.01,
+                    maxPollInterval=0.1,
+                    planner=FakePlanner(backend),
+                    muxer=FakeMuxer(backend),
+                    onEvent=events.append,
+                    **ENGINE_MODES[mode]).run()
+        problems = checkOutputs(outputPath, trackNames, events)
+
+    return problems + checkBinIsClean(backend, clipNames) + [
+        f'{event["remaining"]} automation(s) reported left'
+        for event in events
+        if event['type'] == 'projectGrowth' and event['remaining']
+    ]
+
+
+def checkDistributed(mode, tracks=12, workers=3):
+    """
+    Share a fake bin among fake workstations writing to one output folder
+    :return: problems found, empty when every track was done exactly once
+    """
+    mediaSeconds = {}
+    backends = []
+    for worker in range(workers):
+        backend = FakeScriptModule(renderFps=100000,
+                                   mediaSeconds=mediaSeconds)
+        createFakeBin(backend, tracks=tracks)
+        backends.append(backend)
+    clipNames = ['Loop.mov'] + [f'Track {track:04}.wav'
+                                for track in range(tracks)]
+    trackNames = [clipName[:-4] for clipName in clipNames[1:]]
+    events = []
+
+    with TemporaryDirectory() as outputPath:
+        RenderCoordinator(
+            [
+                DaVinciResolve(scriptModule=backend, host=f'worker-{index}')
+                for index, backend in enumerate(backends)
+            ],
+            projectName='Benchmark',
+            binPath='Bin',
+            outputPath=outputPath,
+            engineOptions=dict(ENGINE_MODES[mode],
+                               minPollInterval=0.01,
+                               maxPollInterval=0.1,
+                               planner=FakePlanner(backends[0]),
+                               muxer=FakeMuxer(backends[0],
+                                               muxSeconds=0.02)),
+            onEvent=events.append).run()
+        problems = checkOutputs(outputPath, trackNames, events)
+
+    for backend in backends:
+        problems.extend(checkBinIsClean(backend, clipNames))
+
+    return problems
+
+
+def runChecks():
+    """
+    :return: (check name, problems) of every end to end check
+    """
+    results = [(f'engine {mode}', checkEngine(mode)) for mode in ENGINE_MODES]
+    results.extend((f'distributed {mode}', checkDistributed(mode))
+                   for mode in ('sequential', 'videoOnce'))
+
+    return results
+
+
+def benchmarkScheduler(jobs, maxConcurrentMuxes=2):
+    """
+    Measure the cost of queueing and collecting jobs that do no work
+    """
+    scheduler = MuxScheduler(maxConcurrentMuxes=maxConcurrentMuxes)
+    started = monotonic()
+    for job in range(jobs):
+        scheduler.submit(dict, tag=job)
+        scheduler.collectFinished()
+    scheduler.shutdown()
+    seconds = monotonic() - started
+
+    return {
+        'benchmark': 'scheduler',
+        'tracks': jobs,
+        'seconds': seconds,
+        'tracksPerSecond': jobs / seconds,
+        'apiCalls': 0,
+        'apiCallsPerTrack': 0,
+        'overheadSeconds': seconds
+    }
+
+
+def benchmarkImports(modules=('davinci', 'browser', 'planner', 'engine',
+                              'workqueue', 'distributed'),
+                     budget=0.5):
+    """
+    Time a fresh interpreter importing each entry module, the startup cost of
+    the tools before they reach Resolve
+    :param budget: seconds an import may take
+    """
+    results = []
+    for module in modules:
+        started = monotonic()
+        run([sys.executable, '-c', f'import {module}'],
+            cwd=dirname(abspath(__file__)),
+            check=True)
+        seconds = monotonic() - started
+        results.append({
+            'benchmark': 'import',
+            'module': module,
+            'seconds': seconds,
+            'budget': budget,
+            'withinBudget': seconds <= budget
+        })
+
+    return results
+
+
+def runBenchmarks(sizes=(10, 100, 1000), latency=0):
+    results = []
+    for tracks in sizes:
+        for mode in ENGINE_MODES:
+            results.append(benchmarkEngine(tracks, mode, latency=latency))
+        results.append(benchmarkScheduler(tracks))
+
+    return results
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        description='Benchmark the automation against a fake Resolve')
+    parser.add_argument('--sizes',
+                        type=int,
+                        nargs='+',
+                        default=[10, 100, 1000],
+                        help='number of tracks of the benchmarked bins')
+    parser.add_argument('--latency',
+                        type=float,
+                        default=0,
+                        help='seconds every fake API call takes')
+    parser.add_argument('--import-budget',
+                        type=float,
+                        default=0.5,
+                        help='seconds a fresh import of a tool may take')
+    parser.add_argument('--json',
+                        action='store_true',
+                        help='print one JSON result per line')
+    args = parser.parse_args(argv)
+
+    checkResults = runChecks()
+    for checkName, problems in checkResults:
+        if args.json:
+            print(dumps({'check': checkName, 'problems': problems}))
+        else:
+            print(f'{"check":<12}{checkName:>24} '
+                  f'{"; ".join(problems) if problems else "ok"}')
+
+    for result in runBenchmarks(args.sizes, args.latency):
+        if args.json:
+            print(dumps(result))
+        else:
+            print(f'{result["benchmark"]:<12}{result["tracks"]:>6} tracks '
+                  f'{result["seconds"]:>9.3f} s '
+                  f'{result["tracksPerSecond"]:>10.1f} tracks/s '
+                  f'{result["apiCallsPerTrack"]:>7.1f} API calls/track '
+                  f'{result["overheadSeconds"]:>8.3f} s overhead')
+
+    importResults = benchmarkImports(budget=args.import_budget)
+    for result in importResults:
+        if args.json:
+            print(dumps(result))
+        else:
+            print(f'{result["benchmark"]:<12}{result["module"]:>12} '
+                  f'{result["seconds"]:>9.3f} s '
+                  f'{"within" if result["withinBudget"] else "over"} the '
+                  f'{result["budget"]} s budget')
+
+    passed = all(result['withinBudget'] for result in importResults) and not any(
+        problems for checkName, problems in checkResults)
+
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+#!/usr/bin/python
+from argparse import ArgumentParser
+from queue import Queue
+from threading import RLock, Thread
+import sys
+
+from clipcache import ClipPropertyCache
+from davinci import DaVinciResolve, configureScriptEnvironment
+from progress import formatDuration
+
+
+class ProjectIndex:
+    """
+    Projects and bin trees of the Resolve database, read lazily and cached
+    per project until refreshed, with per-bin track counts and audio duration
+    computed in the background
+    """
+
+    def __init__(self, resolve, onEvent=None):
+        """
+        :param resolve: DaVinciResolve instance to browse
+        :param onEvent: callable receiving a 'binStats' event for every bin
+        whose statistics were computed in the background, called from the
+        background thread
+        """
+        self.resolve = resolve
+        self.onEvent = onEvent or (lambda event: None)
+        self.lock = RLock()
+        """Own snapshots, the engine lists its folder from another thread"""
+        self.clipProperties = ClipPropertyCache()
+        self.projects = None
+        self.trees = {}
+        self.folders = {}
+        self.loadedProject = None
+        self.statsRequests = Queue()
+        self.statsThread = None
+
+    def getProjects(self, refresh=False):
+        """
+        :return: project names, sorted, None when Resolve is not reachable
+        """
+        with self.lock:
+            if self.projects is None or refresh:
+                projects = self.resolve.getProjects()
+                if projects is None:
+                    return None
+                self.projects = sorted(projects, key=str.lower)
+
+            return self.projects
+
+    def searchProjects(self, text):
+        """
+        :return: project names containing text, case insensitive
+        """
+        text = text.lower()
+
+        return [
+            projectName for projectName in self.getProjects() or []
+            if text in projectName.lower()
+        ]
+
+    def loadProject(self, projectName):
+        """
+        Make projectName the current Resolve project, unless it already is
+        """
+        with self.lock:
+            if self.loadedProject != projectName:
+                self.loadedProject = None
+                self.folders = {}
+                if not self.resolve.loadProject(projectName):
+                    return False
+                self.resolve.getRootFolders()
+                self.loadedProject = projectName
+
+            return True
+
+    def getBins(self, projectName, path='', refresh=False):
+        """
+        :param path: parent bin, like 'Parent/Child', '' for the root
+        :return: nodes of the bins right below path, read from Resolve on
+        first use; each node has the name, path, children paths (None until
+        listed) and the track count and audio seconds (None until computed)
+        """
+        with self.lock:
+            tree = self.trees.setdefault(projectName,
+                                         {'': self.__newNode('', '')})
+            node = tree.get(path)
+            if node is None:
+                return []
+            if node['children'] is None or refresh:
+                if not self.loadProject(projectName):
+                    return []
+                node['children'] = []
+                for folder in self.__getFolder(path).GetSubFolderList() or []:
+                    folderName = folder.GetName()
+                    folderPath = f'{path}/{folderName}' if path else folderName
+                    self.folders[folderPath] = folder
+                    tree[folderPath] = self.__newNode(folderName, folderPath)
+                    node['children'].append(folderPath)
+
+            return [tree[folderPath] for folderPath in node['children']]
+
+    def searchBins(self, projectName, text):
+        """
+        :return: nodes of the bins whose path contains text, case insensitive,
+        listing the whole tree of the project on first use
+        """
+        text = text.lower()
+        with self.lock:
+            pending = ['']
+            while pending:
+                pending.extend(
+                    node['path']
+                    for node in self.getBins(projectName, pending.pop()))
+
+            return [
+                node for folderPath, node in sorted(
+                    self.trees[projectName].items())
+                if folderPath and text in folderPath.lower()
+            ]
+
+    def selectBin(self, projectName, path):
+        """
+        Make the bin at path the current Resolve folder
+        :return: the folder, None when it is gone
+        """
+        with self.lock:
+            if not self.loadProject(projectName):
+                return None
+            folder = self.__getFolder(path)
+
+            return folder and self.resolve.setCurrentFolder(folder)
+
+    def getBinStats(self, projectName, path):
+        """
+        Count the audio files of a bin and add up their duration. The clips
+        are read without the lock, a large bin does not hold up the window
+        :return: the bin node, with 'tracks' and 'seconds' set, None when the
+        project was changed meanwhile
+        """
+        with self.lock:
+            node = self.trees.get(projectName, {}).get(path)
+            if node is None or not self.loadProject(projectName):
+                return None
+            if node['tracks'] is not None:
+                return node
+            folder = self.__getFolder(path)
+
+        clipProperties = self.clipProperties
+        tracks = 0
+        seconds = 0
+        for clip in clipProperties.listClips(folder):
+            if clipProperties.getType(clip) == 'Audio':
+                tracks += 1
+                fps = clipProperties.getFps(clip)
+                if fps:
+                    seconds += clipProperties.getFrames(clip) / fps
+
+        with self.lock:
+            if self.loadedProject != projectName:
+                return None
+            node['tracks'] = tracks
+            node['seconds'] = seconds
+
+            return node
+
+    def requestBinStats(self, projectName, paths):
+        """
+        Compute the statistics of bins in the background, one 'binStats'
+        event each. Requests for another project than the loaded one are
+        dropped, to be made again when it is shown
+        """
+        for path in paths:
+            self.statsRequests.put((projectName, path))
+        if not self.statsThread:
+            self.statsThread = Thread(target=self.__computeBinStats,
+                                      daemon=True)
+            self.statsThread.start()
+
+    def refresh(self, projectName=None):
+        """
+        Forget the cached tree of a project, or the projects and all trees
+        """
+        with self.lock:
+            if projectName is None:
+                self.projects = None
+                self.trees = {}
+            else:
+                self.trees.pop(projectName, None)
+            if projectName in (None, self.loadedProject):
+                self.folders = {}
+                self.clipProperties.invalidate()
+
+    def __newNode(self, name, path):
+        return {
+            'name': name,
+            'path': path,
+            'children': None,
+            'tracks': None,
+            'seconds': None
+        }
+
+    def __getFolder(self, path):
+        """
+        Folder handle of the loaded project, looked up by path when unknown
+        """
+        if not path:
+            return self.resolve.rootFolder
+        if path not in self.folders:
+            self.folders[path] = self.resolve.getFolderByPath(path)
+
+        return self.folders[path]
+
+    def __computeBinStats(self):
+        while True:
+            projectName, path = self.statsRequests.get()
+            if projectName != self.loadedProject:
+                continue
+            try:
+                node = self.getBinStats(projectName, path)
+            except Exception:
+                """Bin deleted or Resolve gone, leave it unknown"""
+                continue
+            if node:
+                self.onEvent({
+                    'type': 'binStats',
+                    'project': projectName,
+                    'path': path,
+                    'tracks': node['tracks'],
+                    'seconds': node['seconds']
+                })
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        description='List the projects of the Resolve database, or the bins '
+        'of one project with their track count and audio duration')
+    parser.add_argument('--search',
+                        default='',
+                        help='only list names containing this text')
+    parser.add_argument('--project', help='list the bins of this project')
+    args = parser.parse_args(argv)
+
+    resolve = DaVinciResolve()
+    if not resolve.connect():
+        for error in resolve.errorMessages:
+            print(error['message'])
+        return 1
+    index = ProjectIndex(resolve)
+
+    if not args.project:
+        for projectName in index.searchProjects(args.search):
+            print(projectName)
+        return 0
+
+    if not index.loadProject(args.project):
+        print(f'Project {args.project} not found')
+        return 1
+    for node in index.searchBins(args.project, args.search):
+        node = index.getBinStats(args.project, node['path'])
+        print(f'{node["path"]:<50}{node["tracks"]:>6} track(s) '
+              f'{formatDuration(node["seconds"]):>10}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    configureScriptEnvironment()
+    sys.exit(main())
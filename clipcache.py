@@ -0,0 +1,61 @@
+#!/usr/bin/python
+
+
+class ClipPropertyCache:
+    """
+    Snapshot of media pool clip properties, fetched with a single
+    GetClipProperty() round trip per clip. Resolve hands out new scripting
+    objects on every GetClips(), so a snapshot only lasts one listing
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+        self.apiCalls = 0
+
+    def listClips(self, folder):
+        """
+        List the clips of a folder and start a new snapshot for them
+        """
+        self.snapshots = {}
+        self.apiCalls += 1
+
+        return list((folder.GetClips() or {}).values())
+
+    def getProperties(self, clip):
+        """
+        :return: full property dictionary of the clip, from cache if present
+        """
+        if clip not in self.snapshots:
+            self.snapshots[clip] = clip.GetClipProperty() or {}
+            self.apiCalls += 1
+
+        return self.snapshots[clip]
+
+    def getType(self, clip):
+        return self.getProperties(clip).get('Type')
+
+    def getFrames(self, clip):
+        return int(self.getProperties(clip).get('Frames') or 0)
+
+    def getFps(self, clip):
+        return float(self.getProperties(clip).get('FPS') or 0)
+
+    def getDuration(self, clip):
+        return self.getProperties(clip).get('Duration')
+
+    def getFilePath(self, clip):
+        return self.getProperties(clip).get('File Path')
+
+    def invalidate(self, clips=None):
+        """
+        Drop snapshots of clips changed in the media pool, or all of them
+        """
+        if clips is None:
+            self.snapshots = {}
+        else:
+            for clip in clips:
+                self.snapshots.pop(clip, None)
+
+
+if __name__ == '__main__':
+    pass
@@ -1,17 +1,57 @@
 #!/usr/bin/python
+from os import environ as env
 from sys import platform
+from time import sleep
 import importlib
 
+from clipcache import ClipPropertyCache
+
+
+def configureScriptEnvironment():
+    """
+    Point the scripting environment variables to the default macOS install
+    """
+    env.update({
+        'RESOLVE_SCRIPT_API':
+        '/Library/Application Support/Blackmagic Design/DaVinci Resolve/Developer/Scripting'
+    })
+    env.update({
+        'RESOLVE_SCRIPT_LIB':
+        '/Applications/DaVinci Resolve/DaVinci Resolve.app/Contents/Libraries/Fusion/fusionscript.so'
+    })
+    env.update({'PYTHONPATH': '$PYTHONPATH:$RESOLVE_SCRIPT_API/Modules/'})
+
 
 class DaVinciResolve:
-    def __init__(self, ):
-        dvr = None
-        self.dvr = None
+    def __init__(self,
+                 scriptModule=None,
+                 host=None,
+                 connectAttempts=4,
+                 retryDelay=0.5,
+                 maxRetryDelay=4):
+        """
+        Resolve is only reached on first use, see connect()
+        :param scriptModule: scripting module to use instead of
+        DaVinciResolveScript, e.g. fakeresolve.FakeScriptModule
+        :param host: address of a remote Resolve workstation, None for the
+        local one
+        :param connectAttempts: tries to reach Resolve before giving up
+        :param retryDelay: wait after the first failed try, doubled after each
+        :param maxRetryDelay: longest wait between two tries
+        """
+        self.scriptModule = scriptModule
+        self.host = host
+        self.connectAttempts = connectAttempts
+        self.retryDelay = retryDelay
+        self.maxRetryDelay = maxRetryDelay
 
         self.errorMessages = []
         self.RENDER_VIDEO_PRESET = 'H.265 Master'
         self.RENDER_AUDIO_PRESET = 'Audio Only'
+        self.RENDER_FINAL_PRESET = 'H.264 Master'
+        self.LOOP_TILE_THRESHOLD = 16
 
+        self.dvr = None
         self.resolve = None
         self.pm = None
         self.mediaStorage = None
@@ -24,9 +64,56 @@ class DaVinciResolve:
         self.workingCompoundVideo = None
         self.workingTimeline = None
         self.finalTimeline = None
+        self.clipProperties = ClipPropertyCache()
+        self.loopTiles = {}
+        self.apiCallCounts = {}
+        self.trackIntermediates = []
+        self.folderIntermediates = []
+        self.automationTimelines = []
+        self.templateTimeline = None
+        self.automationStats = {'created': 0, 'deleted': 0, 'removedAtStart': 0}
+
+    def connect(self):
+        """
+        Reach Resolve, retrying with a growing delay while it starts up
+        :return: True when connected, otherwise the reason is in errorMessages
+        """
+        if self.pm:
+            return True
+        self.errorMessages = []
+        if not self.dvr:
+            self.dvr = self.__loadScriptModule()
+            if not self.dvr:
+                return False
 
+        delay = self.retryDelay
+        for attempt in range(self.connectAttempts):
+            try:
+                self.resolve = self.__scriptapp(self.dvr, self.host)
+            except AttributeError:
+                self.resolve = None
+            if self.resolve:
+                self.pm = self.resolve.GetProjectManager()
+                self.mediaStorage = self.resolve.GetMediaStorage()
+                return True
+            if attempt + 1 < self.connectAttempts:
+                sleep(delay)
+                delay = min(self.maxRetryDelay, delay * 2)
+
+        self.errorMessages.append({
+            'type':
+            'davinci_not_started',
+            'message':
+            'DaVinci Resolve is not running. Make sure you start Resolve before running this app.'
+        })
+        return False
+
+    def __loadScriptModule(self):
+        if self.scriptModule:
+            return self.scriptModule
         try:
-            import DaVinciResolveScript as dvr
+            import DaVinciResolveScript
+            return DaVinciResolveScript
         except ImportError:
             expectedPath = "/Library/Application Support/Blackmagic Design/DaVinci Resolve/Developer/Scripting/Modules/"
             if platform.startswith("darwin"):
@@ -39,7 +126,7 @@ class DaVinciResolve:
             elif platform.startswith("linux"):
                 expectedPath = "/opt/resolve/libs/Fusion/Modules/"
             try:
-                self.dvr = importlib.import_module(
+                return importlib.import_module(
                     'DaVinciResolveScript',
                     expectedPath + 'DaVinciResolveScript.py')
             except ImportError:
@@ -56,23 +143,29 @@ class DaVinciResolve:
                 'message':
                 'DaVinci Resolve is not running. Make sure you start Resolve before running this app.'
             })
-        finally:
-            if dvr:
-                self.resolve = dvr.scriptapp('Resolve')
-            elif self.dvr:
-                self.resolve = self.dvr.scriptapp('Resolve')
-            self.pm = self.resolve.GetProjectManager()
-            self.mediaStorage = self.resolve.GetMediaStorage()
+
+        return None
+
+    def __scriptapp(self, dvr, host):
+        if host:
+            return dvr.scriptapp('Resolve', host)
+        return dvr.scriptapp('Resolve')
 
     def getProjects(self):
-        if self.pm:
+        if self.connect():
             return self.pm.GetProjectListInCurrentFolder()
         else:
             return None
 
     def loadProject(self, projectName):
-        if self.pm:
+        if self.connect():
             self.selectedProject = self.pm.LoadProject(projectName)
+            self.clipProperties.invalidate()
+            self.loopTiles = {}
+            self.trackIntermediates = []
+            self.folderIntermediates = []
+            self.automationTimelines = []
+            self.templateTimeline = None
             return self.selectedProject
         else:
             return None
@@ -92,6 +185,32 @@ class DaVinciResolve:
         else:
             return None
 
+    def walkFolders(self, folder=None, parentPath=''):
+        """
+        Yield (path, folder) for every bin below folder, the root by default,
+        with paths like 'Parent/Child'
+        """
+        if folder is None:
+            if not self.getRootFolders():
+                return
+            folder = self.rootFolder
+        for subFolder in folder.GetSubFolderList() or []:
+            folderPath = parentPath + subFolder.GetName()
+            yield folderPath, subFolder
+            yield from self.walkFolders(subFolder, folderPath + '/')
+
+    def getFolderByPath(self, folderPath):
+        folder = None
+        for folderName in folderPath.strip('/').split('/'):
+            subFolders = self.getRootFolders(
+            ) if folder is None else folder.GetSubFolderList()
+            folder = next((subFolder for subFolder in subFolders or []
+                           if subFolder.GetName() == folderName), None)
+            if folder is None:
+                return None
+
+        return folder
+
     def setCurrentFolder(self, folder):
         if self.mediaPool:
             self.mediaPool.SetCurrentFolder(folder)
@@ -105,18 +224,17 @@ class DaVinciResolve:
         videoClips = []
         timelines = []
         compounds = []
-        clipsInFolder = self.selectedFolder.GetClips()
+        apiCalls = self.clipProperties.apiCalls
 
-        for index in clipsInFolder:
-            clip = clipsInFolder[index]
-            if clip.GetClipProperty('Type') == 'Audio':
+        for clip in self.clipProperties.listClips(self.selectedFolder):
+            clipType = self.clipProperties.getType(clip)
+            if clipType == 'Audio':
                 audioClips.append(clip)
-            if clip.GetClipProperty('Type') == 'Video' or clip.GetClipProperty(
-                    'Type') == 'Video+Audio':
+            elif clipType in ('Video', 'Video+Audio'):
                 videoClips.append(clip)
-            if clip.GetClipProperty('Type') == 'Timeline':
+            elif clipType == 'Timeline':
                 timelines.append(clip)
-            if clip.GetClipProperty('Type') == 'Compound':
+            elif clipType == 'Compound':
                 compounds.append(clip)
 
         self.clipsInFolder = {
@@ -125,6 +243,8 @@ class DaVinciResolve:
             'timelines': timelines,
             'compounds': []
         }
+        self.apiCallCounts['getFolderContent'] = (
+            self.clipProperties.apiCalls - apiCalls)
 
         return self.clipsInFolder
 
@@ -136,6 +256,7 @@ class DaVinciResolve:
             f'Automated Timeline | {self.workingAudioFile.GetName()}',
             self.workingAudioFile)
         self.clipsInFolder['timelines'].append(self.workingTimeline)
+        self.__addIntermediate(self.workingTimeline, isTimeline=True)
         frameRate = self.selectedProject.GetSetting('timelineFrameRate')
 
         return {
@@ -144,6 +265,49 @@ class DaVinciResolve:
             'framerate': frameRate
         }
 
+    def createWorkingTimeline(self, audioClip):
+        """Create an empty timeline for the video of a track of known length"""
+        self.workingAudioFile = audioClip
+        self.workingTimeline = self.mediaPool.CreateEmptyTimeline(
+            f'Automated Timeline | {self.workingAudioFile.GetName()}')
+        self.clipsInFolder['timelines'].append(self.workingTimeline)
+        self.__addIntermediate(self.workingTimeline, isTimeline=True)
+
+        return self.workingTimeline
+
+    def useTemplateTimeline(self, audioClip):
+        """Empty the template timeline, created on first use, for a new track"""
+        self.workingAudioFile = audioClip
+        if self.templateTimeline is None:
+            self.templateTimeline = self.mediaPool.CreateEmptyTimeline(
+                f'Automated Template | {self.selectedFolder.GetName()}')
+            self.clipsInFolder['timelines'].append(self.templateTimeline)
+            self.__addFolderIntermediate(self.templateTimeline,
+                                         isTimeline=True)
+        else:
+            items = (self.templateTimeline.GetItemListInTrack('video', 1) or
+                     []) + (self.templateTimeline.GetItemListInTrack(
+                         'audio', 1) or [])
+            if items:
+                self.templateTimeline.DeleteClips(items)
+        self.workingTimeline = self.templateTimeline
+
+        return self.workingTimeline
+
+    def addAudioToTimeline(self, timeline=None):
+        """Add the working audio file at the start of a timeline"""
+        timeline = timeline or self.workingTimeline
+        self.selectedProject.SetCurrentTimeline(timeline)
+        self.mediaPool.AppendToTimeline([{
+            'mediaPoolItem': self.workingAudioFile,
+            'mediaType': 2,
+            'trackIndex': 1,
+            'recordFrame': timeline.GetStartFrame()
+        }])
+
+    def getTimelineFrameRate(self):
+        return float(self.selectedProject.GetSetting('timelineFrameRate'))
+
     def addVideoClipToTimeline(self, videoClip, frames=None):
         if not frames:
             self.mediaPool.AppendToTimeline(videoClip)
@@ -154,6 +318,41 @@ class DaVinciResolve:
                 'endFrame': frames
             }])
 
+    def addLoopedVideoToTimeline(self, videoClip, frames):
+        """Fill the working timeline with the video clip repeated over frames"""
+        videoFrames = self.getClipFrames(videoClip)
+        instances = frames // videoFrames
+        fragment = frames - instances * videoFrames
+
+        """Video only, the audio of a Video+Audio source would take A1"""
+        if instances >= self.LOOP_TILE_THRESHOLD:
+            """One item per power of two, from pre-built loop compounds"""
+            tiles = self.__getLoopTiles(videoClip, instances)
+            clipInfos = [{
+                'mediaPoolItem': tile,
+                'startFrame': 0,
+                'endFrame': videoFrames * 2**level,
+                'mediaType': 1
+            } for level, tile in enumerate(tiles) if instances >> level & 1]
+        else:
+            clipInfos = [{
+                'mediaPoolItem': videoClip,
+                'startFrame': 0,
+                'endFrame': videoFrames,
+                'mediaType': 1
+            }] * instances
+        if fragment:
+            clipInfos.append({
+                'mediaPoolItem': videoClip,
+                'startFrame': 0,
+                'endFrame': fragment,
+                'mediaType': 1
+            })
+
+        if clipInfos:
+            self.selectedProject.SetCurrentTimeline(self.workingTimeline)
+            self.mediaPool.AppendToTimeline(clipInfos)
+
     def createCompoundVideo(self):
         videoFiles = self.workingTimeline.GetItemListInTrack('video', 1)
         compound = self.workingTimeline.CreateCompoundClip(
@@ -162,45 +361,234 @@ class DaVinciResolve:
                 'startTimecode': '00:00:00:00'
             })
         self.workingCompoundVideo = compound.GetMediaPoolItem()
+        self.__addIntermediate(self.workingCompoundVideo)
 
     def createRenderJob(self, targetDir, renderVideoFileName,
                         renderAudioFileName):
         """Render video and audio parts"""
 
         if self.selectedProject.DeleteAllRenderJobs():
-            """Create render job for video part"""
-            finalVideoTimeline = self.mediaPool.CreateTimelineFromClips(
-                f'Automated Video | {renderVideoFileName}',
-                self.workingCompoundVideo)
-            self.selectedProject.SetCurrentTimeline(finalVideoTimeline)
+            jobIds = self.addTrackRenderJobs(targetDir, renderVideoFileName,
+                                             renderAudioFileName)
+
+            self.openPage('deliver')
+            self.selectedProject.StartRendering()
+            return jobIds
+
+        """Render jobs can't be cleared, e.g. while Resolve is rendering"""
+        return []
+
+    def addTrackRenderJobs(self, targetDir, renderVideoFileName,
+                           renderAudioFileName):
+        """Queue video and audio render jobs without starting the render"""
+
+        """Create render job for video part"""
+        finalVideoTimeline = self.mediaPool.CreateTimelineFromClips(
+            f'Automated Video | {renderVideoFileName}',
+            self.workingCompoundVideo)
+        self.__addIntermediate(finalVideoTimeline, isTimeline=True)
+        self.selectedProject.SetCurrentTimeline(finalVideoTimeline)
+
+        self.selectedProject.LoadRenderPreset(self.RENDER_VIDEO_PRESET)
+        self.selectedProject.SetRenderSettings({
+            'SelectAllFrames': True,
+            'TargetDir': targetDir,
+            'CustomName': renderVideoFileName,
+            'ExportAudio': False,
+            'ExportVideo': True
+        })
+        videoJobId = self.selectedProject.AddRenderJob()
+        """Create render job for audio part"""
+        finalAudioTimeline = self.mediaPool.CreateTimelineFromClips(
+            f'Automated Audio | {renderAudioFileName}',
+            self.workingAudioFile)
+        self.__addIntermediate(finalAudioTimeline, isTimeline=True)
+        self.selectedProject.SetCurrentTimeline(finalAudioTimeline)
+
+        self.selectedProject.LoadRenderPreset(self.RENDER_AUDIO_PRESET)
+        self.selectedProject.SetRenderSettings({
+            'SelectAllFrames': True,
+            'TargetDir': targetDir,
+            'CustomName': renderAudioFileName,
+            'ExportAudio': True,
+            'ExportVideo': False
+        })
+        audioJobId = self.selectedProject.AddRenderJob()
+
+        return [videoJobId, audioJobId]
+
+    def createFinalRenderJob(self, targetDir, renderFileName):
+        """Render video and audio into the final file with a single job"""
+
+        if self.selectedProject.DeleteAllRenderJobs():
+            jobIds = self.addTrackFinalRenderJob(targetDir, renderFileName)
+
+            self.openPage('deliver')
+            self.selectedProject.StartRendering()
+            return jobIds
+
+        return []
+
+    def addTrackFinalRenderJob(self, targetDir, renderFileName):
+        """Queue one job rendering the compound video with the audio"""
+
+        finalTimeline = self.mediaPool.CreateTimelineFromClips(
+            f'Automated Final | {renderFileName}', self.workingCompoundVideo)
+        self.__addIntermediate(finalTimeline, isTimeline=True)
+        self.addAudioToTimeline(finalTimeline)
+
+        self.selectedProject.LoadRenderPreset(self.RENDER_FINAL_PRESET)
+        self.selectedProject.SetRenderSettings({
+            'SelectAllFrames': True,
+            'TargetDir': targetDir,
+            'CustomName': renderFileName,
+            'ExportAudio': True,
+            'ExportVideo': True
+        })
+
+        return [self.selectedProject.AddRenderJob()]
+
+    def createTemplateRenderJobs(self,
+                                 targetDir,
+                                 renderFileName=None,
+                                 renderVideoFileName=None,
+                                 renderAudioFileName=None):
+        """
+        Render the template timeline, holding the looped video and the audio,
+        into the final file, or into video and audio parts when
+        renderFileName is not set
+        """
+
+        if self.selectedProject.DeleteAllRenderJobs():
+            self.selectedProject.SetCurrentTimeline(self.templateTimeline)
+            if renderFileName:
+                jobSettings = [(self.RENDER_FINAL_PRESET, renderFileName, True,
+                                True)]
+            else:
+                jobSettings = [
+                    (self.RENDER_VIDEO_PRESET, renderVideoFileName, False,
+                     True),
+                    (self.RENDER_AUDIO_PRESET, renderAudioFileName, True,
+                     False)
+                ]
+            jobIds = []
+            for preset, customName, exportAudio, exportVideo in jobSettings:
+                self.selectedProject.LoadRenderPreset(preset)
+                self.selectedProject.SetRenderSettings({
+                    'SelectAllFrames': True,
+                    'TargetDir': targetDir,
+                    'CustomName': customName,
+                    'ExportAudio': exportAudio,
+                    'ExportVideo': exportVideo
+                })
+                jobIds.append(self.selectedProject.AddRenderJob())
+
+            self.openPage('deliver')
+            self.selectedProject.StartRendering()
+            return jobIds
+
+        return []
+
+    def deleteAllRenderJobs(self):
+        return self.selectedProject.DeleteAllRenderJobs()
+
+    def startRendering(self, jobIds):
+        """Start a single render pass over all the queued jobs"""
+        self.openPage('deliver')
+        return self.selectedProject.StartRendering(jobIds)
+
+    def stopRendering(self):
+        self.selectedProject.StopRendering()
+
+    def getRenderJobStatus(self, jobId):
+        return self.selectedProject.GetRenderJobStatus(jobId)
+
+    def getRenderJobOutputPath(self, jobId):
+        for job in self.selectedProject.GetRenderJobList():
+            if job.get('JobId') == jobId:
+                return f'{job["TargetDir"]}/{job["OutputFilename"]}'
+
+        return None
+
+    def createLoopRenderJob(self, targetDir, renderLoopFileName, videoClip):
+        """Render the source video clip once, to be looped by ffmpeg"""
+
+        if self.selectedProject.DeleteAllRenderJobs():
+            loopTimeline = self.mediaPool.CreateTimelineFromClips(
+                f'Automated Loop | {renderLoopFileName}', videoClip)
+            self.clipsInFolder['timelines'].append(loopTimeline)
+            self.__addFolderIntermediate(loopTimeline, isTimeline=True)
+            self.selectedProject.SetCurrentTimeline(loopTimeline)
 
             self.selectedProject.LoadRenderPreset(self.RENDER_VIDEO_PRESET)
             self.selectedProject.SetRenderSettings({
                 'SelectAllFrames': True,
                 'TargetDir': targetDir,
-                'CustomName': renderVideoFileName,
+                'CustomName': renderLoopFileName,
                 'ExportAudio': False,
                 'ExportVideo': True
             })
-            self.selectedProject.AddRenderJob()
-            """Create render job for audio part"""
-            finalAudioTimeline = self.mediaPool.CreateTimelineFromClips(
-                f'Automated Audio | {renderAudioFileName}',
-                self.workingAudioFile)
-            self.selectedProject.SetCurrentTimeline(finalAudioTimeline)
-
-            self.selectedProject.LoadRenderPreset(self.RENDER_AUDIO_PRESET)
-            self.selectedProject.SetRenderSettings({
-                'SelectAllFrames': True,
-                'TargetDir': targetDir,
-                'CustomName': renderAudioFileName,
-                'ExportAudio': True,
-                'ExportVideo': False
-            })
-            self.selectedProject.AddRenderJob()
+            jobId = self.selectedProject.AddRenderJob()
 
             self.openPage('deliver')
             self.selectedProject.StartRendering()
+            return [jobId]
+
+        return []
+
+    def takeTrackIntermediates(self):
+        """
+        :return: timelines and compound clips created for the current track
+        since the last call, to be deleted once its render jobs are done
+        """
+        intermediates = self.trackIntermediates
+        self.trackIntermediates = []
+
+        return intermediates
+
+    def takeFolderIntermediates(self):
+        """
+        :return: timelines and compound clips shared by the tracks of the
+        folder, the loop tiles, loop and template timelines, to be deleted
+        once the folder is done
+        """
+        intermediates = self.folderIntermediates
+        self.folderIntermediates = []
+        self.loopTiles = {}
+        self.templateTimeline = None
+
+        return intermediates
+
+    def deleteIntermediates(self, clips):
+        """Delete timelines and compound clips of tracks that are done"""
+        if not clips:
+            return 0
+        """Timelines are no media pool items, DeleteClips leaves them"""
+        timelines = [clip for clip in clips if clip in self.automationTimelines]
+        mediaPoolItems = [clip for clip in clips if clip not in timelines]
+        if timelines:
+            self.mediaPool.DeleteTimelines(timelines)
+            self.automationTimelines = [
+                timeline for timeline in self.automationTimelines
+                if timeline not in timelines
+            ]
+        if mediaPoolItems:
+            self.mediaPool.DeleteClips(mediaPoolItems)
+        self.clipProperties.invalidate(clips)
+        if self.clipsInFolder:
+            self.clipsInFolder['timelines'] = [
+                timeline for timeline in self.clipsInFolder['timelines']
+                if timeline not in clips
+            ]
+        self.automationStats['deleted'] += len(clips)
+
+        return len(clips)
+
+    def getClipFilePath(self, clip):
+        return self.clipProperties.getFilePath(clip)
+
+    def getClipFrames(self, clip):
+        return self.clipProperties.getFrames(clip)
 
     def checkIsRendering(self):
         return self.selectedProject.IsRenderingInProgress()
@@ -209,14 +597,62 @@ class DaVinciResolve:
         self.mediaPool.MoveClips([clip], self.rootFolder)
 
     def removeExistingAutomations(self):
-        clipsInFolder = self.selectedFolder.GetClips()
+        apiCalls = self.clipProperties.apiCalls
+        deletedClips = []
 
-        for index in clipsInFolder:
-            clip = clipsInFolder[index]
-            if clip.GetClipProperty(
-                    'Type') == 'Timeline' or clip.GetClipProperty(
-                        'Type') == 'Compound':
+        for clip in self.clipProperties.listClips(self.selectedFolder):
+            if self.clipProperties.getType(clip) in ('Timeline', 'Compound'):
                 self.mediaPool.DeleteClips(clip)
+                deletedClips.append(clip)
+
+        self.clipProperties.invalidate(deletedClips)
+        self.loopTiles = {}
+        self.trackIntermediates = []
+        self.folderIntermediates = []
+        self.automationTimelines = []
+        self.templateTimeline = None
+        self.automationStats['removedAtStart'] += len(deletedClips)
+        self.apiCallCounts['removeExistingAutomations'] = (
+            len(deletedClips) + self.clipProperties.apiCalls - apiCalls)
+
+    def __addIntermediate(self, clip, isTimeline=False):
+        self.trackIntermediates.append(clip)
+        if isTimeline:
+            self.automationTimelines.append(clip)
+        self.automationStats['created'] += 1
+
+    def __addFolderIntermediate(self, clip, isTimeline=False):
+        self.folderIntermediates.append(clip)
+        if isTimeline:
+            self.automationTimelines.append(clip)
+        self.automationStats['created'] += 1
+
+    def __getLoopTiles(self, videoClip, instances):
+        """
+        Compounds of the video clip repeated 1, 2, 4... times, built by doubling
+        the previous one and reused for every track of the folder. Named after
+        the folder and the clip, Resolve refuses duplicate timeline names
+        """
+        tiles = self.loopTiles.setdefault(videoClip, [videoClip])
+        if 2**len(tiles) <= instances:
+            tileName = (f'{self.selectedFolder.GetName()} | '
+                        f'{videoClip.GetName()}')
+
+        while 2**len(tiles) <= instances:
+            previousTile = tiles[-1]
+            tileTimeline = self.mediaPool.CreateTimelineFromClips(
+                f'Automated Loop Tile | {tileName} | {2**len(tiles)}',
+                [previousTile, previousTile])
+            compound = tileTimeline.CreateCompoundClip(
+                tileTimeline.GetItemListInTrack('video', 1), {
+                    'name': f'Loop Tile | {tileName} | {2**len(tiles)}',
+                    'startTimecode': '00:00:00:00'
+                })
+            tiles.append(compound.GetMediaPoolItem())
+            self.__addFolderIntermediate(tileTimeline, isTimeline=True)
+            self.__addFolderIntermediate(tiles[-1])
+
+        return tiles
 
     def __getAudioDuration(self, timeline):
         audioTrack = timeline.GetItemListInTrack('audio', 1)
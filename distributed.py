@@ -0,0 +1,240 @@
+#!/usr/bin/python
+from argparse import ArgumentParser
+from collections import deque
+from functools import partial
+from threading import Condition, Thread
+from time import monotonic
+import sys
+
+from davinci import DaVinciResolve, configureScriptEnvironment
+from engine import BatchEngine, addEngineArguments, getEngineOptions, printEvent
+
+
+class RenderCoordinator:
+    """
+    Share the tracks of one bin among several Resolve workstations, each
+    driven by its own DaVinciResolve, writing to the same output folder
+    """
+    DONE_EVENTS = ('trackMuxed', 'trackRendered', 'trackFailed',
+                   'trackSkipped')
+
+    def __init__(self,
+                 workers,
+                 projectName,
+                 binPath,
+                 outputPath,
+                 engineOptions=None,
+                 onEvent=None):
+        """
+        :param workers: DaVinciResolve instances, one per workstation, all
+        seeing the project and the source media under the same paths
+        :param projectName: project holding the bin on every workstation
+        :param binPath: bin to process, from the media pool root
+        :param outputPath: output folder shared by all the workstations
+        :param engineOptions: BatchEngine keyword arguments of every worker
+        :param onEvent: callable receiving the engine events, tagged with the
+        'worker' index, and the coordinator events
+        """
+        self.workers = workers
+        self.projectName = projectName
+        self.binPath = binPath
+        self.outputPath = outputPath
+        self.engineOptions = engineOptions or {}
+        self.onEvent = onEvent or (lambda event: None)
+
+        self.condition = Condition()
+        self.queues = [deque() for worker in workers]
+        self.inFlight = [set() for worker in workers]
+        self.alive = [True for worker in workers]
+        self.waiting = [False for worker in workers]
+        self.stats = [{
+            'tracks': 0,
+            'started': None,
+            'seconds': 0
+        } for worker in workers]
+        self.engines = [None for worker in workers]
+
+    def run(self):
+        """
+        Process the bin on all workers, blocking until every track is done
+        """
+        trackNames = self.__listTracks()
+        for index, trackName in enumerate(trackNames):
+            self.queues[index % len(self.workers)].append(trackName)
+
+        threads = [
+            Thread(target=self.__runWorker, args=(index, ), daemon=True)
+            for index in range(len(self.workers))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.onEvent({'type': 'workerStats', 'workers': self.getStats()})
+
+    def cancel(self):
+        with self.condition:
+            for queue in self.queues:
+                queue.clear()
+            self.condition.notify_all()
+        for engine in self.engines:
+            if engine:
+                engine.cancel()
+
+    def getStats(self):
+        """
+        :return: tracks done, busy time and throughput of every worker
+        """
+        with self.condition:
+            return [{
+                'worker': index,
+                'alive': self.alive[index],
+                'tracks': stats['tracks'],
+                'seconds': stats['seconds'],
+                'tracksPerHour': stats['tracks'] * 3600 / stats['seconds']
+                if stats['seconds'] else 0
+            } for index, stats in enumerate(self.stats)]
+
+    def __listTracks(self):
+        """
+        Read the track names of the bin from the first worker that has it
+        """
+        for worker in self.workers:
+            try:
+                clipsInFolder = self.__openBin(worker)
+            except Exception:
+                continue
+            if clipsInFolder:
+                return [
+                    audioFile.GetName()[:-4]
+                    for audioFile in clipsInFolder['audioClips']
+                ]
+
+        return []
+
+    def __openBin(self, worker):
+        if not worker.loadProject(self.projectName):
+            return None
+        folder = worker.getFolderByPath(self.binPath)
+        if not folder:
+            return None
+        worker.setCurrentFolder(folder)
+
+        return worker.getFolderContent()
+
+    def __runWorker(self, index):
+        worker = self.workers[index]
+        try:
+            if not worker.connect():
+                raise ConnectionError(
+                    ', '.join(error['message']
+                              for error in worker.errorMessages))
+            if not self.__openBin(worker):
+                raise LookupError(
+                    f'{self.projectName} / {self.binPath} not found')
+            self.engines[index] = BatchEngine(
+                worker,
+                outputPath=self.outputPath,
+                trackSource=partial(self.__takeTrack, index),
+                onEvent=partial(self.__onWorkerEvent, index),
+                **self.engineOptions)
+            self.engines[index].run()
+        except Exception as error:
+            self.__onWorkerLost(index, error)
+
+    def __takeTrack(self, index):
+        """
+        Next track for a worker: its own queue first, then the tail of the
+        longest queue. Waits while tracks are still in flight on a busy worker,
+        since they come back if it is lost; a waiting worker only finishes its
+        own tracks, their muxes are collected once its engine moves on
+        """
+        with self.condition:
+            while True:
+                if not self.alive[index]:
+                    return None
+                queue = self.queues[index] or max(self.queues, key=len)
+                if queue:
+                    trackName = queue.popleft(
+                    ) if queue is self.queues[index] else queue.pop()
+                    self.inFlight[index].add(trackName)
+                    if self.stats[index]['started'] is None:
+                        self.stats[index]['started'] = monotonic()
+                    return trackName
+                if not any(self.inFlight[other]
+                           for other in range(len(self.workers))
+                           if other != index and self.alive[other]
+                           and not self.waiting[other]):
+                    return None
+                self.waiting[index] = True
+                self.condition.wait()
+                self.waiting[index] = False
+
+    def __onWorkerEvent(self, index, event):
+        if event['type'] in self.DONE_EVENTS:
+            with self.condition:
+                if event['trackName'] in self.inFlight[index]:
+                    self.inFlight[index].discard(event['trackName'])
+                    stats = self.stats[index]
+                    stats['tracks'] += 1
+                    stats['seconds'] = monotonic() - stats['started']
+                self.condition.notify_all()
+
+        self.onEvent(dict(event, worker=index))
+
+    def __onWorkerLost(self, index, error):
+        """
+        Hand the tracks of a lost worker back to the others
+        """
+        with self.condition:
+            self.alive[index] = False
+            requeued = list(self.inFlight[index])
+            self.inFlight[index].clear()
+            self.queues[index].extendleft(requeued)
+            self.condition.notify_all()
+
+        self.onEvent({
+            'type': 'workerLost',
+            'worker': index,
+            'message': str(error),
+            'requeued': requeued
+        })
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        description='Process one bin on several Resolve workstations')
+    parser.add_argument('--project', required=True, help='Resolve project')
+    parser.add_argument('--bin', required=True, help='bin to process')
+    parser.add_argument('--output',
+                        required=True,
+                        help='output folder shared by all the workstations')
+    parser.add_argument('--worker',
+                        action='append',
+                        required=True,
+                        help='address of a Resolve workstation, repeatable')
+    addEngineArguments(parser)
+    args = parser.parse_args(argv)
+
+    workers = []
+    for host in args.worker:
+        worker = DaVinciResolve(host=host)
+        if args.final_preset:
+            worker.RENDER_FINAL_PRESET = args.final_preset
+        workers.append(worker)
+
+    coordinator = RenderCoordinator(workers,
+                                    projectName=args.project,
+                                    binPath=args.bin,
+                                    outputPath=args.output.rstrip('/') + '/',
+                                    engineOptions=getEngineOptions(args),
+                                    onEvent=printEvent)
+    coordinator.run()
+
+    return 0
+
+
+if __name__ == '__main__':
+    configureScriptEnvironment()
+    sys.exit(main())
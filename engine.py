@@ -0,0 +1,971 @@
+#!/usr/bin/python
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from functools import partial
+from os import makedirs, remove as rm
+from os.path import dirname, exists, getsize, normpath
+from shutil import copy2
+from queue import Empty, Queue
+from time import monotonic
+import sys
+
+from davinci import DaVinciResolve, configureScriptEnvironment
+from monitor import RenderMonitor
+from journal import JobJournal
+import muxer as ffmpegMuxer
+from outputcache import OutputCache, mediaIdentity
+from planner import DurationPlanner
+from progress import ProgressModel, formatDuration
+from scheduler import MuxScheduler
+from tracing import Tracer
+
+
+class BatchEngine:
+    """
+    Render every audio file of the current Resolve folder over the looped
+    folder video, independently of any user interface
+    """
+    RENDER_QUEUE_BUSY = 'render jobs could not be queued, is Resolve rendering?'
+
+    def __init__(self,
+                 resolve,
+                 outputPath,
+                 renderVideoOnce=False,
+                 batchRender=False,
+                 singleJobRender=False,
+                 maxConcurrentMuxes=2,
+                 maxTempBytes=50 * 1024**3,
+                 muxAudioCodec='aac',
+                 muxAudioBitrate='320k',
+                 durationCachePath=None,
+                 useJournal=True,
+                 cachePath=None,
+                 cacheMaxBytes=20 * 1024**3,
+                 tracer=None,
+                 minPollInterval=0.5,
+                 maxPollInterval=10,
+                 trackSource=None,
+                 reuseTimeline=False,
+                 progressInterval=1,
+                 planner=None,
+                 muxer=None,
+                 onEvent=None):
+        """
+        :param resolve: DaVinciResolve instance with the folder to process
+        selected
+        :param outputPath: folder receiving the rendered files
+        :param renderVideoOnce: render the video once and loop it in ffmpeg
+        :param batchRender: queue all render jobs in a single render pass
+        :param singleJobRender: render video and audio straight into the final
+        file with one job per track, instead of two jobs and a mux
+        :param maxConcurrentMuxes: how many ffmpeg muxes may run at once
+        :param maxTempBytes: temporary disk the pending muxes may hold
+        :param muxAudioCodec: audio codec of the output container
+        :param muxAudioBitrate: audio bitrate of the output container
+        :param durationCachePath: JSON file keeping probed audio durations
+        :param useJournal: record finished stages in the output folder and skip
+        them when the folder is processed again
+        :param cachePath: folder of the output cache, None to disable it
+        :param cacheMaxBytes: size of the intermediates kept in the cache
+        :param tracer: Tracer recording the time, API calls and bytes written
+        of every stage, None to disable tracing
+        :param minPollInterval: shortest wait between render status polls
+        :param maxPollInterval: longest wait between render status polls
+        :param trackSource: callable returning the name of the next track to
+        process, or None when there is none left; processes the whole folder
+        in order when not set. Tracks are then processed one at a time, even
+        with batchRender
+        :param reuseTimeline: render every track from one template timeline
+        whose video and audio are swapped, instead of new timelines and
+        compound clips per track. Tracks are then processed one at a time,
+        even with batchRender
+        :param progressInterval: seconds between 'progress' events, with the
+        frames done, throughput and time left of the whole folder
+        :param planner: planner of the audio lengths, a DurationPlanner
+        probing with ffprobe when not set
+        :param muxer: provider of muxVideoAudio, muxLoopedVideo and
+        probeDuration, the ffmpeg muxer module when not set
+        :param onEvent: callable receiving progress events, called from the
+        thread running the engine
+        """
+        self.resolve = resolve
+        self.outputPath = outputPath
+        self.renderVideoOnce = renderVideoOnce
+        self.batchRender = batchRender
+        self.singleJobRender = singleJobRender
+        self.maxConcurrentMuxes = maxConcurrentMuxes
+        self.maxTempBytes = maxTempBytes
+        self.muxAudioCodec = muxAudioCodec
+        self.muxAudioBitrate = muxAudioBitrate
+        self.onEvent = onEvent or (lambda event: None)
+        self.planner = planner or DurationPlanner(
+            cachePath=durationCachePath)
+        self.muxer = muxer or ffmpegMuxer
+        self.useJournal = useJournal
+        self.journal = None
+        self.outputCache = OutputCache(
+            cachePath, cacheMaxBytes) if cachePath else None
+        self.trackKeys = {}
+        self.tracer = tracer
+        self.minPollInterval = minPollInterval
+        self.maxPollInterval = maxPollInterval
+        self.trackSource = trackSource
+        self.reuseTimeline = reuseTimeline
+        self.progressInterval = progressInterval
+        self.progress = ProgressModel()
+        self.lastProgressReport = 0
+        if tracer:
+            tracer.instrument(resolve)
+
+        self.clipsInFolder = None
+        self.trackFrames = {}
+        self.loopVideoPath = None
+        self.loopVideoCached = False
+        self.muxScheduler = None
+        self.renderMonitor = None
+        self.cancelled = False
+        self.automationStats = None
+
+    def run(self):
+        """
+        Process the current folder, blocking until it is done or cancelled
+        """
+        self.cancelled = False
+        self.automationStats = dict(self.resolve.automationStats)
+        self.progress = ProgressModel()
+
+        """Setup inside too, 'finished' is emitted whatever fails"""
+        try:
+            self.resolve.removeExistingAutomations()
+            self.clipsInFolder = self.resolve.getFolderContent()
+            if self.useJournal:
+                self.journal = JobJournal(self.outputPath)
+            with self.__span('plan'):
+                self.__planFolder()
+            self.muxScheduler = MuxScheduler(
+                maxConcurrentMuxes=self.maxConcurrentMuxes,
+                maxTempBytes=self.maxTempBytes)
+            self.__emit({
+                'type': 'started',
+                'tracks': len(self.clipsInFolder['audioClips']),
+                'frames': sum(frames or 0
+                              for frames in self.trackFrames.values()),
+                'apiCalls': dict(self.resolve.apiCallCounts)
+            })
+
+            self.__skipFinishedTracks()
+            if self.batchRender and not (self.renderVideoOnce
+                                         or self.trackSource
+                                         or self.reuseTimeline):
+                self.__processBatch()
+            else:
+                self.__processSequentially()
+        finally:
+            self.__finishProcessing()
+
+    def cancel(self):
+        """
+        Start no further track and abort the render in progress, whose track
+        then fails; muxes already queued are still finished
+        """
+        self.cancelled = True
+        if self.renderMonitor and self.renderMonitor.is_alive():
+            self.resolve.stopRendering()
+
+    def __span(self, stage, trackName=None):
+        return self.tracer.span(stage, trackName) if self.tracer else nullcontext()
+
+    def __planFolder(self):
+        """
+        Probe the length of every audio file, in timeline frames, up front
+        """
+        audioPaths = {
+            audioFile: self.resolve.getClipFilePath(audioFile)
+            for audioFile in self.clipsInFolder['audioClips']
+        }
+        framesByPath = self.planner.planFrames(
+            list(set(audioPaths.values())),
+            self.resolve.getTimelineFrameRate())
+        self.trackFrames = {
+            audioFile: framesByPath[path]
+            for audioFile, path in audioPaths.items()
+        }
+        for error in self.planner.errorMessages:
+            self.__emit({'type': 'warning', 'message': error['message']})
+        self.planner.errorMessages = []
+        videoIdentity = mediaIdentity(
+            self.resolve.getClipFilePath(self.clipsInFolder['videoClips'][0]))
+        renderSettings = self.__getRenderSettings()
+        self.trackKeys = {}
+        for audioFile in self.clipsInFolder['audioClips']:
+            trackName = audioFile.GetName()[:-4]
+            self.trackKeys[trackName] = OutputCache.makeKey(
+                videoIdentity, mediaIdentity(audioPaths[audioFile]),
+                *renderSettings)
+            self.__recordStage(trackName, 'planned')
+            """Shared bin, only the tracks handed to this engine count"""
+            if not self.trackSource:
+                self.progress.addTrack(trackName, self.trackFrames[audioFile])
+
+    def __getRenderSettings(self):
+        """
+        Settings that change the rendered files, part of the track keys
+        """
+        if self.singleJobRender and not self.renderVideoOnce:
+            presets = ('single', self.resolve.RENDER_FINAL_PRESET)
+        else:
+            presets = ('loop' if self.renderVideoOnce else 'split',
+                       self.resolve.RENDER_VIDEO_PRESET,
+                       self.resolve.RENDER_AUDIO_PRESET, self.muxAudioCodec,
+                       self.muxAudioBitrate)
+
+        return presets + (self.resolve.getTimelineFrameRate(), )
+
+    def __skipFinishedTracks(self):
+        """
+        Leave out the tracks whose verified output is still in place, made from
+        the current sources and settings
+        """
+        if self.trackSource:
+            """Checked one by one, as the tracks are handed out"""
+            return
+        for audioFile in list(self.clipsInFolder['audioClips']):
+            self.__skipIfFinished(audioFile)
+
+    def __skipIfFinished(self, audioFile):
+        """
+        :return: True when the track was already done and is left out
+        """
+        trackName = audioFile.GetName()[:-4]
+        if not ((self.journal and self.journal.isValid(
+                trackName, 'verified', self.trackKeys.get(trackName)))
+                or (self.outputCache
+                    and self.__restoreCachedOutput(audioFile, trackName))):
+            return False
+        self.resolve.moveFinishedFileToRoot(audioFile)
+        self.clipsInFolder['audioClips'].remove(audioFile)
+        self.__emit({'type': 'trackSkipped', 'trackName': trackName})
+
+        return True
+
+    def __nextAudioFile(self):
+        """
+        :return: next audio file to process, None when there is none left
+        """
+        if not self.trackSource:
+            return self.clipsInFolder['audioClips'][0] if len(
+                self.clipsInFolder['audioClips']) else None
+
+        audioFilesByName = {
+            audioFile.GetName()[:-4]: audioFile
+            for audioFile in self.clipsInFolder['audioClips']
+        }
+        while not self.cancelled:
+            trackName = self.trackSource()
+            if trackName is None:
+                return None
+            audioFile = audioFilesByName.get(trackName)
+            if audioFile is None:
+                self.__emit({
+                    'type': 'trackFailed',
+                    'trackName': trackName,
+                    'message': 'not found in the bin'
+                })
+            elif not self.__skipIfFinished(audioFile):
+                self.progress.addTrack(trackName,
+                                       self.trackFrames.get(audioFile))
+                return audioFile
+
+        return None
+
+    def __restoreCachedOutput(self, audioFile, trackName):
+        """
+        Find an output made from the same sources and settings, copying it to
+        the output folder when it was rendered somewhere else
+        :return: True on a cache hit
+        """
+        key = self.trackKeys.get(trackName)
+        cachedPath = key and self.outputCache.getOutput(key)
+        if not cachedPath:
+            return False
+
+        if normpath(dirname(cachedPath)) != normpath(self.outputPath):
+            outputPath = f'{self.outputPath}/{cachedPath.split("/")[-1]}'
+            copy2(cachedPath, outputPath)
+            self.outputCache.recordOutput(key, outputPath)
+            self.__recordStage(trackName, 'verified', outputPath)
+        self.__emit({'type': 'cacheHit', 'trackName': trackName})
+
+        return True
+
+    def __hasRenderedTrack(self, trackName):
+        """
+        True when both temporary renders of the track survived a previous run
+        made from the current sources and settings
+        """
+        key = self.trackKeys.get(trackName)
+
+        return (self.journal and not self.singleJobRender
+                and self.journal.isValid(trackName, 'renderedVideo', key)
+                and self.journal.isValid(trackName, 'renderedAudio', key))
+
+    def __recordStage(self, trackName, stage, path=None):
+        if self.journal:
+            self.journal.record(trackName, stage, path,
+                                self.trackKeys.get(trackName))
+
+    def __getTrackFrames(self, currentAudioFile, currentTrackName):
+        """
+        Planned track length, from a throwaway timeline when it was not probed
+        """
+        frames = self.trackFrames.get(currentAudioFile)
+        if not frames:
+            frames = int(
+                self.resolve.createTimelineFromAudio(currentAudioFile)
+                ['duration'])
+            self.progress.addTrack(currentTrackName, frames)
+
+        return frames
+
+    def __processSequentially(self):
+        """
+        Process the audio files of the folder one at a time
+        """
+        if self.renderVideoOnce and self.clipsInFolder[
+                'audioClips'] and not self.__renderLoopVideo():
+            return
+
+        while not self.cancelled:
+            currentAudioFile = self.__nextAudioFile()
+            if currentAudioFile is None:
+                break
+            currentTrackName = currentAudioFile.GetName()[:-4]
+            self.__emit({'type': 'trackStarted', 'trackName': currentTrackName})
+            if self.renderVideoOnce:
+                self.__muxTrackWithLoopVideo(currentAudioFile, currentTrackName)
+            elif self.__hasRenderedTrack(currentTrackName):
+                self.__submitTrackMux(currentAudioFile, currentTrackName)
+            else:
+                self.__renderTrack(currentAudioFile, currentTrackName)
+            self.clipsInFolder['audioClips'].remove(currentAudioFile)
+            self.__onMuxesFinished(self.muxScheduler.collectFinished())
+
+    def __renderTrack(self, currentAudioFile, currentTrackName):
+        """
+        Render the looped video and the audio of one track in Resolve
+        """
+        with self.__span('buildTimeline', currentTrackName):
+            if self.reuseTimeline:
+                self.__buildTemplateTimeline(currentAudioFile,
+                                             currentTrackName)
+            else:
+                self.__buildTrackVideo(currentAudioFile, currentTrackName)
+        """Create the render job"""
+        with self.__span('queueRender', currentTrackName):
+            if self.reuseTimeline:
+                jobIds = self.resolve.createTemplateRenderJobs(
+                    targetDir=self.outputPath,
+                    renderFileName=currentTrackName
+                    if self.singleJobRender else None,
+                    renderVideoFileName=currentTrackName + ' VIDEO',
+                    renderAudioFileName=currentTrackName + ' AUDIO')
+            elif self.singleJobRender:
+                jobIds = self.resolve.createFinalRenderJob(
+                    targetDir=self.outputPath, renderFileName=currentTrackName)
+            else:
+                jobIds = self.resolve.createRenderJob(
+                    targetDir=self.outputPath,
+                    renderVideoFileName=currentTrackName + ' VIDEO',
+                    renderAudioFileName=currentTrackName + ' AUDIO')
+        if not jobIds:
+            self.__emit({
+                'type': 'trackFailed',
+                'trackName': currentTrackName,
+                'message': self.RENDER_QUEUE_BUSY
+            })
+            self.__collectTrackGarbage(currentTrackName)
+            return
+        self.progress.setJobs(currentTrackName, jobIds)
+        """Wait for render job to complete"""
+        with self.__span('renderWait', currentTrackName):
+            statuses = self.__waitForRender(jobIds)
+        if all(status == 'Complete' for status in statuses.values()):
+            self.__onTrackRendered(currentAudioFile, currentTrackName, jobIds)
+        else:
+            self.__emit({'type': 'trackFailed', 'trackName': currentTrackName})
+        self.__collectTrackGarbage(currentTrackName)
+
+    def __buildTemplateTimeline(self, currentAudioFile, currentTrackName):
+        """
+        Swap the looped video and the audio of the template timeline
+        """
+        frames = self.__getTrackFrames(currentAudioFile,
+                                           currentTrackName)
+        self.resolve.useTemplateTimeline(currentAudioFile)
+        self.resolve.addLoopedVideoToTimeline(
+            self.clipsInFolder['videoClips'][0], frames)
+        self.resolve.addAudioToTimeline()
+
+    def __collectTrackGarbage(self, currentTrackName, intermediates=None):
+        """
+        Delete the timelines and compound clips of a track whose render jobs
+        are done, so the project does not grow with every track
+        """
+        if intermediates is None:
+            intermediates = self.resolve.takeTrackIntermediates()
+        if intermediates:
+            with self.__span('collectGarbage', currentTrackName):
+                self.resolve.deleteIntermediates(intermediates)
+
+    def __collectFolderGarbage(self):
+        """
+        Delete the loop tiles, loop and template timelines shared by the
+        tracks, once the folder is done or cancelled
+        """
+        intermediates = self.resolve.takeFolderIntermediates()
+        if intermediates:
+            with self.__span('collectGarbage'):
+                self.resolve.deleteIntermediates(intermediates)
+
+    def __buildTrackVideo(self, currentAudioFile, currentTrackName):
+        """
+        Build the compound video repeated to the length of one audio file
+        """
+        frames = self.trackFrames.get(currentAudioFile)
+        if frames:
+            self.resolve.createWorkingTimeline(currentAudioFile)
+        else:
+            """Not probed, read the length from a timeline with the audio"""
+            frames = int(
+                self.resolve.createTimelineFromAudio(currentAudioFile)
+                ['duration'])
+            self.progress.addTrack(currentTrackName, frames)
+        """Repeat the video clip over the whole audio duration"""
+        self.resolve.addLoopedVideoToTimeline(
+            self.clipsInFolder['videoClips'][0], frames)
+        """Create a compound video and add it to an empty timeline"""
+        self.resolve.createCompoundVideo()
+
+    def __onTrackRendered(self, currentAudioFile, currentTrackName, jobIds):
+        """
+        Finish a track whose render jobs completed
+        """
+        if self.singleJobRender:
+            """Resolve wrote the final file, nothing left to mux"""
+            outputPath = self.resolve.getRenderJobOutputPath(jobIds[0])
+            if self.tracer and outputPath and exists(outputPath):
+                self.tracer.record('output',
+                                   currentTrackName,
+                                   bytesWritten=getsize(outputPath))
+            self.__recordStage(currentTrackName, 'muxed', outputPath)
+            self.__verifyOutput(currentAudioFile, currentTrackName, outputPath)
+            self.resolve.moveFinishedFileToRoot(currentAudioFile)
+            self.__emit({'type': 'trackRendered', 'trackName': currentTrackName})
+        else:
+            self.__recordStage(currentTrackName, 'renderedVideo',
+                               f'{self.outputPath}/{currentTrackName} VIDEO.mov')
+            self.__recordStage(currentTrackName, 'renderedAudio',
+                               f'{self.outputPath}/{currentTrackName} AUDIO.mov')
+            self.__submitTrackMux(currentAudioFile, currentTrackName)
+
+    def __verifyOutput(self, currentAudioFile, currentTrackName, outputPath):
+        """
+        Check that the final file lasts as long as the planned track
+        """
+        if not (self.journal or self.outputCache) or not outputPath:
+            return
+        frames = self.trackFrames.get(currentAudioFile)
+        seconds = self.muxer.probeDuration(outputPath)
+        if seconds and (not frames or abs(
+                seconds - frames / self.resolve.getTimelineFrameRate()) <= 1):
+            self.__recordStage(currentTrackName, 'verified', outputPath)
+            if self.outputCache and self.trackKeys.get(currentTrackName):
+                self.outputCache.recordOutput(
+                    self.trackKeys[currentTrackName], outputPath)
+        else:
+            self.__emit({
+                'type': 'warning',
+                'message': f'{outputPath} does not match the audio length'
+            })
+
+    def __submitTrackMux(self, currentAudioFile, currentTrackName):
+        """
+        Mux and remove temporary files while the next track renders
+        """
+        videoPath = f'{self.outputPath}/{currentTrackName} VIDEO.mov'
+        audioPath = f'{self.outputPath}/{currentTrackName} AUDIO.mov'
+        self.muxScheduler.submit(
+            partial(self.muxer.muxVideoAudio,
+                    videoPath=videoPath,
+                    audioPath=audioPath,
+                    outputPath=f'{self.outputPath}/{currentTrackName}.mp4',
+                    audioCodec=self.muxAudioCodec,
+                    audioBitrate=self.muxAudioBitrate),
+            tempFiles=(videoPath, audioPath),
+            tag=(currentAudioFile, currentTrackName))
+
+    def __processBatch(self):
+        """
+        Queue the render jobs of every audio file and render them in one pass
+        """
+        batchJobs = {}
+        builtJobs = []
+        if not self.resolve.deleteAllRenderJobs():
+            for audioFile in self.clipsInFolder['audioClips']:
+                self.__emit({
+                    'type': 'trackFailed',
+                    'trackName': audioFile.GetName()[:-4],
+                    'message': self.RENDER_QUEUE_BUSY
+                })
+            return
+        for currentAudioFile in self.clipsInFolder['audioClips']:
+            if self.cancelled:
+                """Nothing rendered yet, drop the queued jobs and timelines"""
+                self.resolve.deleteAllRenderJobs()
+                for job in builtJobs:
+                    self.__collectTrackGarbage(job['trackName'],
+                                               job['intermediates'])
+                return
+            currentTrackName = currentAudioFile.GetName()[:-4]
+            if self.__hasRenderedTrack(currentTrackName):
+                self.__submitTrackMux(currentAudioFile, currentTrackName)
+                continue
+            with self.__span('buildTimeline', currentTrackName):
+                self.__buildTrackVideo(currentAudioFile, currentTrackName)
+            with self.__span('queueRender', currentTrackName):
+                if self.singleJobRender:
+                    jobIds = self.resolve.addTrackFinalRenderJob(
+                        targetDir=self.outputPath,
+                        renderFileName=currentTrackName)
+                else:
+                    jobIds = self.resolve.addTrackRenderJobs(
+                        targetDir=self.outputPath,
+                        renderVideoFileName=currentTrackName + ' VIDEO',
+                        renderAudioFileName=currentTrackName + ' AUDIO')
+            job = {
+                'audioFile': currentAudioFile,
+                'trackName': currentTrackName,
+                'jobIds': jobIds,
+                'intermediates': self.resolve.takeTrackIntermediates(),
+                'statuses': {}
+            }
+            builtJobs.append(job)
+            for jobId in jobIds:
+                batchJobs[jobId] = job
+            self.progress.setJobs(currentTrackName, jobIds)
+
+        def __onJobComplete(jobId, status):
+            """Mux a track as soon as both its jobs are done"""
+            job = batchJobs.pop(jobId)
+            job['statuses'][jobId] = status
+            if len(job['statuses']) == len(job['jobIds']):
+                self.__onBatchTrackRendered(job)
+
+        batchJobIds = list(batchJobs)
+        self.resolve.startRendering(batchJobIds)
+        with self.__span('renderWait'):
+            self.__waitForRender(batchJobIds, __onJobComplete)
+
+    def __onBatchTrackRendered(self, job):
+        self.__emit({'type': 'trackStarted', 'trackName': job['trackName']})
+        if all(status == 'Complete' for status in job['statuses'].values()):
+            self.__onTrackRendered(job['audioFile'], job['trackName'],
+                                   job['jobIds'])
+        else:
+            self.__emit({'type': 'trackFailed', 'trackName': job['trackName']})
+        self.__collectTrackGarbage(job['trackName'], job['intermediates'])
+        self.clipsInFolder['audioClips'].remove(job['audioFile'])
+
+    def __renderLoopVideo(self):
+        """
+        Render the source video once, to be looped by ffmpeg for every track
+        """
+        videoClip = self.clipsInFolder['videoClips'][0]
+        loopVideoKey = None
+        if self.outputCache:
+            loopVideoKey = OutputCache.makeKey(
+                mediaIdentity(self.resolve.getClipFilePath(videoClip)),
+                'loop', self.resolve.RENDER_VIDEO_PRESET,
+                self.resolve.getTimelineFrameRate())
+            cachedPath = loopVideoKey and self.outputCache.getIntermediate(
+                loopVideoKey)
+            if cachedPath:
+                self.loopVideoPath = cachedPath
+                self.loopVideoCached = True
+                self.__emit({'type': 'cacheHit', 'trackName': 'loop video'})
+                return True
+
+        loopVideoName = self.resolve.selectedFolder.GetName() + ' LOOP'
+        if self.resolve.host:
+            """Workers share the output folder, each loops its own render"""
+            loopVideoName += ' ' + ''.join(
+                char if char.isalnum() or char in '.-' else '_'
+                for char in self.resolve.host)
+        jobIds = self.resolve.createLoopRenderJob(
+            targetDir=self.outputPath,
+            renderLoopFileName=loopVideoName,
+            videoClip=videoClip)
+        if not jobIds:
+            self.__emit({
+                'type': 'trackFailed',
+                'trackName': loopVideoName,
+                'message': self.RENDER_QUEUE_BUSY
+            })
+            return False
+        """Wait for render job to complete"""
+        with self.__span('loopRender'):
+            statuses = self.__waitForRender(jobIds)
+        self.loopVideoPath = f'{self.outputPath}/{loopVideoName}.mov'
+        if 'Complete' not in statuses.values():
+            self.__emit({'type': 'trackFailed', 'trackName': loopVideoName})
+            return False
+
+        if loopVideoKey:
+            """Keep the loop video for the next runs over the same source"""
+            self.loopVideoPath = self.outputCache.putIntermediate(
+                loopVideoKey, self.loopVideoPath)
+            self.loopVideoCached = True
+
+        return True
+
+    def __muxTrackWithLoopVideo(self, currentAudioFile, currentTrackName):
+        """
+        Loop and trim the rendered video to the audio length, without rendering
+        """
+        with self.__span('buildTimeline', currentTrackName):
+            frames = self.__getTrackFrames(currentAudioFile,
+                                           currentTrackName)
+        self.__collectTrackGarbage(currentTrackName)
+        self.muxScheduler.submit(
+            partial(self.muxer.muxLoopedVideo,
+                    loopVideoPath=self.loopVideoPath,
+                    audioPath=self.resolve.getClipFilePath(currentAudioFile),
+                    outputPath=f'{self.outputPath}/{currentTrackName}.mp4',
+                    frames=frames,
+                    audioCodec=self.muxAudioCodec,
+                    audioBitrate=self.muxAudioBitrate),
+            tag=(currentAudioFile, currentTrackName))
+
+    def __waitForRender(self, jobIds, onJobComplete=None):
+        """
+        Wait for render jobs while collecting the muxes finished meanwhile
+        :param onJobComplete: called with the id and status of every job as
+        soon as it finishes
+        :return: final status of every job
+        """
+        renderEvents = Queue()
+        self.renderMonitor = RenderMonitor(self.resolve,
+                                           jobIds,
+                                           renderEvents,
+                                           minInterval=self.minPollInterval,
+                                           maxInterval=self.maxPollInterval)
+        self.renderMonitor.start()
+
+        while True:
+            try:
+                event = renderEvents.get(timeout=1)
+            except Empty:
+                self.__onMuxesFinished(self.muxScheduler.collectFinished())
+                self.__reportProgress()
+                continue
+            if event['type'] == 'progress':
+                self.progress.onJobProgress(event['jobId'],
+                                            event['percentage'])
+                self.__emit({
+                    'type': 'renderProgress',
+                    'percentage': event['percentage']
+                })
+                self.__reportProgress()
+            elif event['type'] == 'jobComplete':
+                if event['status'] == 'Complete':
+                    self.progress.onJobProgress(event['jobId'], 100)
+                if onJobComplete:
+                    onJobComplete(event['jobId'], event['status'])
+            elif event['type'] == 'finished':
+                return event['statuses']
+            elif event['type'] == 'error':
+                raise event['error']
+
+    def __onMuxesFinished(self, finishedMuxes):
+        """
+        Mark finished tracks in the media pool and report them
+        """
+        for (audioFile, trackName), muxStats in finishedMuxes:
+            if self.tracer:
+                self.tracer.record('mux',
+                                   trackName,
+                                   seconds=muxStats['seconds'],
+                                   bytesWritten=muxStats['bytes'])
+                self.tracer.record('cleanup',
+                                   trackName,
+                                   seconds=muxStats.get('cleanupSeconds', 0))
+            self.__recordStage(trackName, 'muxed', muxStats['path'])
+            self.__verifyOutput(audioFile, trackName, muxStats['path'])
+            self.resolve.moveFinishedFileToRoot(audioFile)
+            self.__emit({
+                'type': 'trackMuxed',
+                'trackName': trackName,
+                'bytes': muxStats['bytes'],
+                'seconds': muxStats['seconds']
+            })
+
+    def __finishProcessing(self):
+        """
+        Wait for the background muxes, when the folder is done or cancelled.
+        'finished' is emitted even when the cleanup fails, e.g. Resolve gone
+        """
+        try:
+            if self.muxScheduler:
+                self.__onMuxesFinished(self.muxScheduler.shutdown())
+                for error in self.muxScheduler.errorMessages:
+                    self.__emit({
+                        'type': 'trackFailed',
+                        'trackName': error['tag'][1],
+                        'message': error['message']
+                    })
+                self.muxScheduler = None
+            self.__removeLoopVideo()
+            if self.journal:
+                self.journal.close()
+                self.journal = None
+            self.__collectFolderGarbage()
+            self.__reportProjectGrowth()
+            self.__reportProgress(force=True)
+            if self.tracer:
+                self.__emit({'type': 'summary', 'stages': self.tracer.close()})
+        finally:
+            self.__emit({'type': 'finished'})
+
+    def __emit(self, event):
+        """
+        Keep the folder progress up to date with the track events, then pass
+        them on
+        """
+        if event['type'] in ('trackMuxed', 'trackRendered'):
+            self.progress.completeTrack(event['trackName'])
+        elif event['type'] in ('trackSkipped', 'trackFailed'):
+            self.progress.removeTrack(event['trackName'])
+        self.onEvent(event)
+        if event['type'] in ('trackMuxed', 'trackRendered'):
+            self.__reportProgress(force=True)
+
+    def __reportProgress(self, force=False):
+        """
+        Report frames done, throughput and time left, every progressInterval
+        """
+        if not force and (monotonic() - self.lastProgressReport <
+                          self.progressInterval):
+            return
+        self.lastProgressReport = monotonic()
+        self.onEvent(dict(self.progress.getSnapshot(), type='progress'))
+
+    def __reportProjectGrowth(self):
+        """
+        Report the timelines and compound clips the run left in the project
+        """
+        if self.automationStats is None:
+            return
+        created, deleted, removedAtStart = (
+            self.resolve.automationStats[stat] - self.automationStats[stat]
+            for stat in ('created', 'deleted', 'removedAtStart'))
+        self.__emit({
+            'type': 'projectGrowth',
+            'created': created,
+            'deleted': deleted,
+            'removedAtStart': removedAtStart,
+            'remaining': created - deleted
+        })
+        self.automationStats = None
+
+    def __removeLoopVideo(self):
+        """
+        Remove the video rendered once, when the folder is done or cancelled
+        """
+        if self.loopVideoPath and exists(
+                self.loopVideoPath) and not self.loopVideoCached:
+            rm(self.loopVideoPath)
+        self.loopVideoPath = None
+        self.loopVideoCached = False
+
+
+def printEvent(event):
+    """
+    Report engine events on the console, for headless runs
+    """
+    if event['type'] == 'binStarted':
+        print(f'{event["project"]} / {event["bin"]}: '
+              f'{event["tracks"]} audio file(s)')
+    elif event['type'] == 'binSkipped':
+        print(f'{event["project"]} / {event["bin"]}: no video and audio, '
+              f'skipped')
+    elif event['type'] == 'started':
+        print(f'Processing {event["tracks"]} audio file(s), '
+              f'{event["frames"]} frames')
+        for operation, apiCalls in event['apiCalls'].items():
+            print(f'{operation}: {apiCalls} Resolve API call(s)')
+    elif event['type'] == 'trackStarted':
+        print(f'{event["trackName"]}: started')
+    elif event['type'] == 'trackMuxed':
+        print(f'{event["trackName"]}: {event["bytes"] / 1048576:.1f} MB '
+              f'written in {event["seconds"]:.1f} s')
+    elif event['type'] == 'cacheHit':
+        print(f'{event["trackName"]}: cache hit')
+    elif event['type'] == 'trackSkipped':
+        print(f'{event["trackName"]}: already done, skipped')
+    elif event['type'] == 'trackRendered':
+        print(f'{event["trackName"]}: rendered')
+    elif event['type'] == 'trackFailed':
+        print(f'{event["trackName"]}: failed {event.get("message", "")}')
+    elif event['type'] == 'summary':
+        print(f'{"stage":<40}{"count":>7}{"p50 s":>10}{"p95 s":>10}'
+              f'{"API calls":>11}{"MB":>10}')
+        for stage, stats in sorted(event['stages'].items()):
+            print(f'{stage:<40}{stats["count"]:>7}{stats["p50"]:>10.2f}'
+                  f'{stats["p95"]:>10.2f}{stats["apiCalls"]:>11}'
+                  f'{stats["bytes"] / 1048576:>10.1f}')
+    elif event['type'] == 'progress':
+        print(f'{event["percentage"]:.1f}% of {event["totalFrames"]} frames, '
+              f'{event["fps"]:.1f} fps, {formatDuration(event["eta"])} left')
+    elif event['type'] == 'projectGrowth':
+        print(f'Project: {event["created"]} timeline(s) and compound clip(s) '
+              f'created, {event["deleted"]} deleted, {event["remaining"]} '
+              f'left, {event["removedAtStart"]} from earlier runs removed')
+    elif event['type'] == 'workerLost':
+        print(f'Worker {event["worker"]} lost: {event["message"]}, '
+              f'{len(event["requeued"])} track(s) requeued')
+    elif event['type'] == 'workerStats':
+        for stats in event['workers']:
+            print(f'Worker {stats["worker"]}: {stats["tracks"]} track(s) in '
+                  f'{stats["seconds"]:.1f} s, '
+                  f'{stats["tracksPerHour"]:.1f} tracks/h')
+    elif event['type'] == 'warning':
+        print(event['message'])
+    elif event['type'] == 'finished':
+        print('Done')
+
+
+def addEngineArguments(parser):
+    """
+    Add the processing options shared by the headless entry points
+    """
+    parser.add_argument('--single-job',
+                        action='store_true',
+                        help='render each track straight into the final file')
+    parser.add_argument('--final-preset',
+                        help='render preset of --single-job renders')
+    parser.add_argument('--max-muxes',
+                        type=int,
+                        default=2,
+                        help='ffmpeg muxes running at once')
+    parser.add_argument('--max-temp-gb',
+                        type=float,
+                        default=50,
+                        help='temporary disk the pending muxes may hold')
+    parser.add_argument('--render-video-once',
+                        action='store_true',
+                        help='render the video once and loop it in ffmpeg')
+    parser.add_argument('--batch-render',
+                        action='store_true',
+                        help='queue all render jobs in a single render pass')
+    parser.add_argument('--reuse-timeline',
+                        action='store_true',
+                        help='render every track from one template timeline')
+    parser.add_argument('--audio-codec', default='aac')
+    parser.add_argument('--audio-bitrate', default='320k')
+    parser.add_argument('--no-journal',
+                        action='store_true',
+                        help='do not record or skip already finished tracks')
+    parser.add_argument('--cache-dir',
+                        help='folder of the output cache, off when not set')
+    parser.add_argument('--cache-max-gb',
+                        type=float,
+                        default=20,
+                        help='size of the intermediates kept in the cache')
+    parser.add_argument('--progress-interval',
+                        type=float,
+                        default=10,
+                        help='seconds between progress, fps and ETA lines')
+    parser.add_argument('--trace',
+                        help='JSON lines file receiving per-stage timings')
+    parser.add_argument('--prometheus',
+                        help='Prometheus textfile written at the end of the run')
+    parser.add_argument('--duration-cache',
+                        help='JSON file keeping probed audio durations')
+
+
+def getEngineOptions(args):
+    """
+    :return: BatchEngine keyword arguments from the parsed engine arguments
+    """
+    return {
+        'renderVideoOnce': args.render_video_once,
+        'batchRender': args.batch_render,
+        'singleJobRender': args.single_job,
+        'reuseTimeline': args.reuse_timeline,
+        'progressInterval': args.progress_interval,
+        'maxConcurrentMuxes': args.max_muxes,
+        'maxTempBytes': int(args.max_temp_gb * 1024**3),
+        'muxAudioCodec': args.audio_codec,
+        'muxAudioBitrate': args.audio_bitrate,
+        'durationCachePath': args.duration_cache,
+        'useJournal': not args.no_journal,
+        'cachePath': args.cache_dir,
+        'cacheMaxBytes': int(args.cache_max_gb * 1024**3),
+        'tracer': Tracer(args.trace, args.prometheus)
+        if args.trace or args.prometheus else None
+    }
+
+
+def parseArguments(argv=None):
+    parser = ArgumentParser(
+        description='Render every audio file of a Resolve bin over the '
+        'looped bin video, without the GUI')
+    parser.add_argument('--project', required=True, help='Resolve project')
+    parser.add_argument('--bin',
+                        required=True,
+                        help='first-level bin of the project to process')
+    parser.add_argument('--output', required=True, help='output folder')
+    addEngineArguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArguments(argv)
+    resolve = DaVinciResolve()
+    if args.final_preset:
+        resolve.RENDER_FINAL_PRESET = args.final_preset
+    if not resolve.connect():
+        for error in resolve.errorMessages:
+            print(error['message'])
+        return 1
+    if not resolve.loadProject(args.project):
+        print(f'Project {args.project} not found')
+        return 1
+
+    folders = [
+        folder for folder in resolve.getRootFolders() or []
+        if folder.GetName() == args.bin
+    ]
+    if not folders:
+        print(f'Bin {args.bin} not found in {args.project}')
+        return 1
+    resolve.setCurrentFolder(folders[0])
+    clipsInFolder = resolve.getFolderContent()
+    if not clipsInFolder['videoClips'] or not clipsInFolder['audioClips']:
+        print(f'Bin {args.bin} needs a video file and at least one audio file')
+        return 1
+
+    makedirs(args.output, exist_ok=True)
+    engine = BatchEngine(resolve,
+                         outputPath=args.output.rstrip('/') + '/',
+                         onEvent=printEvent,
+                         **getEngineOptions(args))
+    engine.run()
+
+    return 0
+
+
+if __name__ == '__main__':
+    configureScriptEnvironment()
+    sys.exit(main())
@@ -0,0 +1,585 @@
+#!/usr/bin/python
+from itertools import count
+from os import makedirs
+from os.path import getsize, normpath
+from threading import Lock
+from time import monotonic, sleep
+
+
+class FakeScriptModule:
+    """
+    In-process stand-in for the DaVinciResolveScript module, serving the
+    scripting objects used by the automation without a running Resolve
+    """
+
+    def __init__(self,
+                 latency=0,
+                 renderFps=10000,
+                 frameRate=25,
+                 mediaSeconds=None):
+        """
+        :param latency: seconds every API call takes, to model the round trip
+        :param renderFps: frames rendered per second by the fake render engine
+        :param frameRate: timeline frame rate of the projects
+        :param mediaSeconds: length of the media files by path, shared by the
+        fake workstations of one shared output folder
+        """
+        self.latency = latency
+        self.renderFps = renderFps
+        self.frameRate = frameRate
+        self.apiCalls = 0
+        self.lock = Lock()
+        self.ids = count(1)
+        self.mediaSeconds = {} if mediaSeconds is None else mediaSeconds
+        self.app = FakeResolve(self)
+
+    def scriptapp(self, name, host=None):
+        return self.app if name == 'Resolve' else None
+
+    def call(self):
+        """
+        Account for one API round trip
+        """
+        with self.lock:
+            self.apiCalls += 1
+        if self.latency:
+            sleep(self.latency)
+
+    def nextId(self):
+        with self.lock:
+            return str(next(self.ids))
+
+    def setMediaSeconds(self, filePath, seconds):
+        """
+        Record the length of a media file, as FakePlanner and FakeMuxer see it
+        """
+        self.mediaSeconds[normpath(filePath)] = seconds
+
+    def getMediaSeconds(self, filePath):
+        return self.mediaSeconds.get(normpath(filePath))
+
+    def addProject(self, projectName):
+        project = FakeProject(self, projectName)
+        self.app.projectManager.projects[projectName] = project
+        return project
+
+
+class FakeObject:
+
+    def __init__(self, backend):
+        self.backend = backend
+
+
+class FakeResolve(FakeObject):
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.projectManager = FakeProjectManager(backend)
+        self.currentPage = 'media'
+
+    def GetProjectManager(self):
+        self.backend.call()
+        return self.projectManager
+
+    def GetMediaStorage(self):
+        self.backend.call()
+        return FakeObject(self.backend)
+
+    def OpenPage(self, page):
+        self.backend.call()
+        self.currentPage = page
+        return True
+
+
+class FakeProjectManager(FakeObject):
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.projects = {}
+
+    def GetProjectListInCurrentFolder(self):
+        self.backend.call()
+        return list(self.projects)
+
+    def LoadProject(self, projectName):
+        self.backend.call()
+        return self.projects.get(projectName)
+
+
+class FakeProject(FakeObject):
+
+    def __init__(self, backend, projectName):
+        super().__init__(backend)
+        self.name = projectName
+        self.mediaPool = FakeMediaPool(backend, self)
+        self.currentTimeline = None
+        self.renderSettings = {}
+        self.renderJobs = {}
+        self.renderQueue = []
+        self.renderStarted = None
+        self.renderStopped = False
+
+    def GetName(self):
+        self.backend.call()
+        return self.name
+
+    def GetMediaPool(self):
+        self.backend.call()
+        return self.mediaPool
+
+    def GetSetting(self, settingName):
+        self.backend.call()
+        if settingName == 'timelineFrameRate':
+            return str(self.backend.frameRate)
+        return ''
+
+    def SetCurrentTimeline(self, timeline):
+        self.backend.call()
+        self.currentTimeline = timeline
+        return True
+
+    def LoadRenderPreset(self, presetName):
+        self.backend.call()
+        self.renderSettings = {'Preset': presetName}
+        return True
+
+    def SetRenderSettings(self, settings):
+        self.backend.call()
+        self.renderSettings.update(settings)
+        return True
+
+    def AddRenderJob(self):
+        self.backend.call()
+        jobId = self.backend.nextId()
+        self.renderJobs[jobId] = {
+            'JobId': jobId,
+            'TargetDir': self.renderSettings.get('TargetDir', ''),
+            'OutputFilename': self.renderSettings.get('CustomName', jobId) +
+            '.mov',
+            'frames': self.currentTimeline.getFrames(),
+            'status': 'Ready'
+        }
+        return jobId
+
+    def DeleteAllRenderJobs(self):
+        self.backend.call()
+        self.renderJobs = {}
+        self.renderQueue = []
+        return True
+
+    def StartRendering(self, jobIds=None):
+        self.backend.call()
+        self.renderQueue = list(jobIds or self.renderJobs)
+        self.renderStarted = monotonic()
+        self.renderStopped = False
+        return True
+
+    def StopRendering(self):
+        self.backend.call()
+        self.__updateRender()
+        self.renderStopped = True
+        for jobId in self.renderQueue:
+            if self.renderJobs[jobId]['status'] != 'Complete':
+                self.renderJobs[jobId]['status'] = 'Cancelled'
+
+    def IsRenderingInProgress(self):
+        self.backend.call()
+        self.__updateRender()
+        return any(self.renderJobs[jobId]['status'] == 'Rendering'
+                   for jobId in self.renderQueue)
+
+    def GetRenderJobStatus(self, jobId):
+        self.backend.call()
+        self.__updateRender()
+        job = self.renderJobs.get(jobId)
+        if not job:
+            return {}
+        return {
+            'JobStatus': job['status'],
+            'CompletionPercentage': job.get('percentage', 0)
+        }
+
+    def GetRenderJobList(self):
+        self.backend.call()
+        return [{
+            key: value
+            for key, value in job.items()
+            if key in ('JobId', 'TargetDir', 'OutputFilename')
+        } for job in self.renderJobs.values()]
+
+    def __updateRender(self):
+        """
+        Advance the queued jobs one after the other at the fake render speed
+        """
+        if self.renderStarted is None or self.renderStopped:
+            return
+        with self.backend.lock:
+            renderedFrames = (monotonic() -
+                              self.renderStarted) * self.backend.renderFps
+            for jobId in self.renderQueue:
+                job = self.renderJobs[jobId]
+                if job['status'] == 'Cancelled':
+                    continue
+                if renderedFrames >= job['frames']:
+                    if job['status'] != 'Complete':
+                        job['status'] = 'Complete'
+                        job['percentage'] = 100
+                        self.__writeOutput(job)
+                    renderedFrames -= job['frames']
+                else:
+                    job['status'] = 'Rendering'
+                    job['percentage'] = int(100 * renderedFrames /
+                                            max(job['frames'], 1))
+                    break
+
+    def __writeOutput(self, job):
+        if job['TargetDir']:
+            makedirs(job['TargetDir'], exist_ok=True)
+            outputPath = f'{job["TargetDir"]}/{job["OutputFilename"]}'
+            with open(outputPath, 'wb') as output:
+                output.write(b'\0' * 1024)
+            self.backend.setMediaSeconds(
+                outputPath, job['frames'] / self.backend.frameRate)
+
+
+class FakeMediaPool(FakeObject):
+    MEDIA_TYPES = {1: 'video', 2: 'audio'}
+
+    def __init__(self, backend, project):
+        super().__init__(backend)
+        self.project = project
+        self.rootFolder = FakeFolder(backend, 'Master')
+        self.currentFolder = self.rootFolder
+
+    def GetRootFolder(self):
+        self.backend.call()
+        return self.rootFolder
+
+    def SetCurrentFolder(self, folder):
+        self.backend.call()
+        self.currentFolder = folder
+        return True
+
+    def CreateEmptyTimeline(self, timelineName):
+        self.backend.call()
+        return self.__addTimeline(FakeTimeline(self.backend, timelineName))
+
+    def CreateTimelineFromClips(self, timelineName, clips):
+        self.backend.call()
+        timeline = FakeTimeline(self.backend, timelineName)
+        for clip in clips if isinstance(clips, list) else [clips]:
+            timeline.append(clip, 0, clip.frames)
+        return self.__addTimeline(timeline)
+
+    def AppendToTimeline(self, clips):
+        self.backend.call()
+        timeline = self.project.currentTimeline
+        items = []
+        for clip in clips if isinstance(clips, list) else [clips]:
+            if isinstance(clip, dict):
+                items.append(
+                    timeline.append(clip['mediaPoolItem'],
+                                    clip.get('startFrame', 0),
+                                    clip.get('endFrame',
+                                             clip['mediaPoolItem'].frames),
+                                    self.MEDIA_TYPES.get(
+                                        clip.get('mediaType'))))
+            else:
+                items.append(timeline.append(clip, 0, clip.frames))
+        return items
+
+    def MoveClips(self, clips, folder):
+        self.backend.call()
+        for clip in clips:
+            self.__findFolder(clip).clips.remove(clip)
+            folder.clips.append(clip)
+        return True
+
+    def DeleteClips(self, clips):
+        """Media pool items only, like Resolve, a timeline is refused"""
+        self.backend.call()
+        clips = clips if isinstance(clips, list) else [clips]
+        if not all(isinstance(clip, FakeMediaPoolItem) for clip in clips):
+            return False
+        for clip in clips:
+            folder = self.__findFolder(clip)
+            if folder:
+                folder.clips.remove(clip)
+        return True
+
+    def DeleteTimelines(self, timelines):
+        self.backend.call()
+        if not all(isinstance(timeline, FakeTimeline)
+                   for timeline in timelines):
+            return False
+        for timeline in timelines:
+            folder = self.__findFolder(timeline.mediaPoolItem)
+            if folder:
+                folder.clips.remove(timeline.mediaPoolItem)
+        return True
+
+    def __addTimeline(self, timeline):
+        """Resolve refuses a timeline named like another of the project"""
+        if self.__findTimeline(timeline.name):
+            return None
+        timeline.folder = self.currentFolder
+        self.currentFolder.clips.append(timeline.mediaPoolItem)
+        self.project.currentTimeline = timeline
+        return timeline
+
+    def __findTimeline(self, timelineName, folder=None):
+        folder = folder or self.rootFolder
+        for clip in folder.clips:
+            if clip.type == 'Timeline' and clip.name == timelineName:
+                return clip
+        for subFolder in folder.subFolders:
+            found = self.__findTimeline(timelineName, subFolder)
+            if found:
+                return found
+        return None
+
+    def __findFolder(self, clip, folder=None):
+        folder = folder or self.rootFolder
+        if clip in folder.clips:
+            return folder
+        for subFolder in folder.subFolders:
+            found = self.__findFolder(clip, subFolder)
+            if found:
+                return found
+        return None
+
+
+class FakeFolder(FakeObject):
+
+    def __init__(self, backend, folderName):
+        super().__init__(backend)
+        self.name = folderName
+        self.clips = []
+        self.subFolders = []
+
+    def GetName(self):
+        self.backend.call()
+        return self.name
+
+    def GetClips(self):
+        self.backend.call()
+        return {index + 1: clip for index, clip in enumerate(self.clips)}
+
+    def GetSubFolderList(self):
+        self.backend.call()
+        return list(self.subFolders)
+
+    def addSubFolder(self, folderName):
+        folder = FakeFolder(self.backend, folderName)
+        self.subFolders.append(folder)
+        return folder
+
+    def addClip(self, clipName, clipType, frames, filePath=None):
+        clip = FakeMediaPoolItem(self.backend, clipName, clipType, frames,
+                                 filePath or f'/fake/{clipName}')
+        self.clips.append(clip)
+        self.backend.setMediaSeconds(clip.filePath,
+                                     frames / self.backend.frameRate)
+        return clip
+
+
+class FakeMediaPoolItem(FakeObject):
+
+    def __init__(self, backend, clipName, clipType, frames, filePath=None):
+        super().__init__(backend)
+        self.name = clipName
+        self.type = clipType
+        self.frames = frames
+        self.filePath = filePath
+
+    def GetName(self):
+        self.backend.call()
+        return self.name
+
+    def GetClipProperty(self, propertyName=None):
+        self.backend.call()
+        properties = {
+            'Type': self.type,
+            'Frames': str(self.frames),
+            'FPS': str(self.backend.frameRate),
+            'Duration': str(self.frames),
+            'File Path': self.filePath or ''
+        }
+        return properties.get(propertyName) if propertyName else properties
+
+
+class FakeTimeline(FakeObject):
+    """
+    Timeline, listed in its folder through a media pool item of its own
+    """
+
+    def __init__(self, backend, timelineName):
+        super().__init__(backend)
+        self.name = timelineName
+        self.mediaPoolItem = FakeMediaPoolItem(backend, timelineName,
+                                               'Timeline', 0)
+        self.tracks = {'video': [], 'audio': []}
+        self.folder = None
+
+    def GetName(self):
+        self.backend.call()
+        return self.name
+
+    def append(self, clip, startFrame, endFrame, trackType=None):
+        if not trackType and clip.type == 'Video+Audio':
+            """Both parts of the clip, like Resolve without a mediaType"""
+            self.append(clip, startFrame, endFrame, 'audio')
+            trackType = 'video'
+        elif not trackType:
+            trackType = 'audio' if clip.type == 'Audio' else 'video'
+        item = FakeTimelineItem(self.backend, clip, endFrame - startFrame)
+        self.tracks[trackType].append(item)
+        return item
+
+    def getFrames(self):
+        return max(
+            sum(item.duration for item in items)
+            for items in self.tracks.values())
+
+    def GetItemListInTrack(self, trackType, index):
+        self.backend.call()
+        return list(self.tracks[trackType])
+
+    def GetStartFrame(self):
+        self.backend.call()
+        return 0
+
+    def DeleteClips(self, items):
+        self.backend.call()
+        for trackType in self.tracks:
+            self.tracks[trackType] = [
+                item for item in self.tracks[trackType] if item not in items
+            ]
+        return True
+
+    def CreateCompoundClip(self, items, clipInfo):
+        self.backend.call()
+        compound = FakeMediaPoolItem(self.backend, clipInfo['name'],
+                                     'Compound',
+                                     sum(item.duration for item in items))
+        if self.folder:
+            self.folder.clips.append(compound)
+        self.tracks['video'] = [
+            FakeTimelineItem(self.backend, compound, compound.frames)
+        ]
+        return self.tracks['video'][0]
+
+
+class FakeTimelineItem(FakeObject):
+
+    def __init__(self, backend, clip, duration):
+        super().__init__(backend)
+        self.clip = clip
+        self.duration = duration
+
+    def GetDuration(self):
+        self.backend.call()
+        return self.duration
+
+    def GetMediaPoolItem(self):
+        self.backend.call()
+        return self.clip
+
+
+class FakePlanner:
+    """
+    DurationPlanner reading the audio lengths the fake backend knows, instead
+    of probing files with ffprobe
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.errorMessages = []
+
+    def planFrames(self, filePaths, frameRate):
+        frames = {}
+        for path in filePaths:
+            seconds = self.backend.getMediaSeconds(path)
+            frames[path] = round(seconds * frameRate) if seconds else None
+
+        return frames
+
+
+class FakeMuxer:
+    """
+    Stand-in for the muxer module, writing small files of the expected length
+    instead of running ffmpeg
+    """
+
+    def __init__(self, backend, muxSeconds=0):
+        """
+        :param muxSeconds: seconds every mux takes
+        """
+        self.backend = backend
+        self.muxSeconds = muxSeconds
+
+    def muxVideoAudio(self,
+                      videoPath,
+                      audioPath,
+                      outputPath,
+                      audioCodec='copy',
+                      audioBitrate=None):
+        return self.__writeOutput(outputPath,
+                                  self.backend.getMediaSeconds(audioPath),
+                                  videoPath, audioPath)
+
+    def muxLoopedVideo(self,
+                       loopVideoPath,
+                       audioPath,
+                       outputPath,
+                       frames,
+                       audioCodec='aac',
+                       audioBitrate=None):
+        return self.__writeOutput(outputPath,
+                                  frames / self.backend.frameRate,
+                                  loopVideoPath)
+
+    def probeDuration(self, filePath):
+        return self.backend.getMediaSeconds(filePath)
+
+    def __writeOutput(self, outputPath, seconds, *renderedPaths):
+        """Fail like ffmpeg when a rendered input is gone, e.g. deleted early"""
+        started = monotonic()
+        for path in renderedPaths:
+            getsize(path)
+        if self.muxSeconds:
+            sleep(self.muxSeconds)
+        for path in renderedPaths:
+            getsize(path)
+        with open(outputPath, 'wb') as output:
+            output.write(b'\0' * 1024)
+        self.backend.setMediaSeconds(outputPath, seconds)
+
+        return {
+            'path': outputPath,
+            'bytes': 1024,
+            'seconds': monotonic() - started
+        }
+
+
+def createFakeBin(backend,
+                  projectName='Benchmark',
+                  binName='Bin',
+                  tracks=10,
+                  videoFrames=250,
+                  trackFrames=4500):
+    """
+    Add a project with one bin holding a video clip and the audio tracks
+    :return: the fake project
+    """
+    project = backend.addProject(projectName)
+    folder = project.mediaPool.rootFolder.addSubFolder(binName)
+    folder.addClip('Loop.mov', 'Video', videoFrames)
+    for track in range(tracks):
+        folder.addClip(f'Track {track:04}.wav', 'Audio', trackFrames)
+
+    return project
+
+
+if __name__ == '__main__':
+    pass
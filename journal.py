@@ -0,0 +1,101 @@
+#!/usr/bin/python
+from hashlib import sha256
+from os.path import exists, getsize, join
+from threading import Lock
+from time import time
+import sqlite3
+
+
+class JobJournal:
+    """
+    Per-track record of the processing stages whose artifacts were written,
+    kept in SQLite next to the output files so a restarted run can skip them.
+    Each stage keeps the key of the sources and settings it was made with
+    """
+    STAGES = ('planned', 'renderedVideo', 'renderedAudio', 'muxed',
+              'verified')
+    JOURNAL_FILE_NAME = '.automation_journal.sqlite'
+    CHECKSUM_SAMPLE_BYTES = 1024 * 1024
+
+    def __init__(self, outputPath):
+        self.lock = Lock()
+        self.connection = sqlite3.connect(join(outputPath,
+                                               self.JOURNAL_FILE_NAME),
+                                          check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS stages ('
+                'trackName TEXT, stage TEXT, path TEXT, size INTEGER, '
+                'checksum TEXT, updated REAL, key TEXT, '
+                'PRIMARY KEY (trackName, stage))')
+            columns = [
+                column[1] for column in self.connection.execute(
+                    'PRAGMA table_info(stages)')
+            ]
+            if 'key' not in columns:
+                """Journal of an older version, its stages match no key"""
+                self.connection.execute(
+                    'ALTER TABLE stages ADD COLUMN key TEXT')
+
+    def record(self, trackName, stage, path=None, key=None):
+        """
+        Mark a stage as done, fingerprinting its artifact when there is one
+        :param key: key of the sources and settings the stage was made with
+        """
+        size = getsize(path) if path else None
+        checksum = self.__checksum(path) if path else None
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO stages (trackName, stage, path, size, '
+                'checksum, updated, key) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (trackName, stage, path, size, checksum, time(), key))
+
+    def isValid(self, trackName, stage, key=None):
+        """
+        :param key: key of the current sources and settings
+        :return: True when the stage is done with the same key and its
+        artifact is unchanged
+        """
+        entry = self.__getEntry(trackName, stage)
+        if not entry:
+            return False
+        path, size, checksum, entryKey = entry
+        if entryKey != key:
+            return False
+        if not path:
+            return True
+
+        return exists(path) and getsize(path) == size and self.__checksum(
+            path) == checksum
+
+    def getPath(self, trackName, stage):
+        entry = self.__getEntry(trackName, stage)
+
+        return entry[0] if entry else None
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __getEntry(self, trackName, stage):
+        with self.lock:
+            return self.connection.execute(
+                'SELECT path, size, checksum, key FROM stages '
+                'WHERE trackName = ? AND stage = ?',
+                (trackName, stage)).fetchone()
+
+    def __checksum(self, path):
+        """
+        Hash of the size, head and tail of the file, cheap for large masters
+        """
+        digest = sha256(str(getsize(path)).encode())
+        with open(path, 'rb') as artifact:
+            digest.update(artifact.read(self.CHECKSUM_SAMPLE_BYTES))
+            artifact.seek(max(0, getsize(path) - self.CHECKSUM_SAMPLE_BYTES))
+            digest.update(artifact.read(self.CHECKSUM_SAMPLE_BYTES))
+
+        return digest.hexdigest()
+
+
+if __name__ == '__main__':
+    pass
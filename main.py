@@ -1,15 +1,14 @@
 #!/usr/bin/python
-from os import environ as env
-from os import remove as rm
 from tkinter import *
-from tkinter import filedialog
 from tkinter import ttk
-from functools import partial
-from math import floor
-from time import sleep
-import ffmpeg
+from os.path import expanduser, join
+from queue import Empty, Queue
+from threading import Thread
 
-from davinci import DaVinciResolve
+from browser import ProjectIndex
+from davinci import DaVinciResolve, configureScriptEnvironment
+from engine import BatchEngine
+from progress import formatDuration
 
 
 class ResolveAutomation:
@@ -17,9 +16,27 @@ class ResolveAutomation:
         """
         Initialize variables and load DaVinci scripting support
         """
+        self.MUX_AUDIO_CODEC = 'aac'
+        self.MUX_AUDIO_BITRATE = '320k'
+        self.MAX_CONCURRENT_MUXES = 2
+        self.MAX_TEMP_BYTES = 50 * 1024**3
+        self.CACHE_PATH = join(expanduser('~'), '.resolve_automation_cache')
+        self.CACHE_MAX_BYTES = 20 * 1024**3
+
         self.window = Tk()
         self.resolve = DaVinciResolve()
+        self.indexEvents = Queue()
+        self.index = ProjectIndex(self.resolve, onEvent=self.indexEvents.put)
+        self.projectSearch = StringVar(self.window, value='')
+        self.selectedProject = None
+        self.treeBins = None
         self.outputPath = None
+        self.engine = None
+        self.engineEvents = Queue()
+        self.renderVideoOnce = BooleanVar(self.window, value=False)
+        self.batchRender = BooleanVar(self.window, value=False)
+        self.singleJobRender = BooleanVar(self.window, value=False)
+        self.reuseTimeline = BooleanVar(self.window, value=False)
 
         self.__startGUI()
 
@@ -28,7 +45,8 @@ class ResolveAutomation:
         Main GUI controller
         """
         self.__basigGUIsetup()
-        self.__generateProjectSelectionButtons()
+        """Show the window first, Resolve is reached on the project list"""
+        self.window.after(0, self.__generateProjectSelectionButtons)
         self.window.mainloop()
 
     def __basigGUIsetup(self):
@@ -36,7 +54,7 @@ class ResolveAutomation:
         Generic window decoration and setup
         """
         self.window.title('DaVinci Resolve Automated Render')
-        self.window.geometry('750x450')
+        self.window.geometry('750x650')
         self.framePrjSelect = Frame(self.window, height=150, width=750)
         self.framePrjSelect.pack(pady=15)
         self.frameFolderSelect = Frame(self.window, height=150, width=750)
@@ -53,85 +71,187 @@ class ResolveAutomation:
                                            length=750,
                                            mode='determinate')
         self.progressBar.pack()
+        self.statusLabel = Label(self.frameProgressBar, text='')
+        self.statusLabel.pack(side=BOTTOM)
 
     def __generateProjectSelectionButtons(self):
         """
-        Load the project list from Resolve and generate selection buttons
+        Searchable list of the projects, read once from Resolve
+        """
+        projects = self.index.getProjects()
+        if projects is None:
+            self.__showConnectionError()
+            return
+
+        prjLabel = Label(self.framePrjSelect, text='Select your project:')
+        prjLabel.pack(side=TOP, anchor=N)
+        prjSearch = Entry(self.framePrjSelect, textvariable=self.projectSearch)
+        prjSearch.pack(side=LEFT, anchor=N, padx=5)
+        prjRefresh = Button(self.framePrjSelect,
+                            text='Refresh',
+                            command=self.__onRefresh)
+        prjRefresh.pack(side=RIGHT, anchor=N, padx=5)
+        prjScrollbar = Scrollbar(self.framePrjSelect)
+        prjScrollbar.pack(side=RIGHT, fill=Y)
+        self.listProjects = Listbox(self.framePrjSelect,
+                                    height=6,
+                                    width=60,
+                                    exportselection=False,
+                                    yscrollcommand=prjScrollbar.set)
+        self.listProjects.pack(side=LEFT)
+        prjScrollbar.config(command=self.listProjects.yview)
+        self.listProjects.bind('<<ListboxSelect>>', self.__onProjectSelect)
+        self.projectSearch.trace_add('write', self.__showProjects)
+        self.__showProjects()
+        self.__processIndexEvents()
+
+    def __showConnectionError(self):
         """
-        self.btnsProjects = []
+        Explain why Resolve could not be reached and offer to try again
+        """
+        for message in self.resolve.errorMessages:
+            Label(self.framePrjSelect, text=message['message']).pack(side=TOP)
 
-        projects = self.resolve.getProjects()
+        def __retry():
+            for w in self.framePrjSelect.winfo_children():
+                w.destroy()
+            self.__generateProjectSelectionButtons()
 
-        framePrjButtons = Frame(self.framePrjSelect, height=50, width=800)
-        framePrjButtons.pack(side=BOTTOM, pady=5)
+        Button(self.framePrjSelect, text='Retry', command=__retry).pack()
 
-        if len(projects) <= 9:
-            prjLabel = Label(self.framePrjSelect, text='Select your project:')
-            prjLabel.pack(side=TOP, anchor=N)
+    def __showProjects(self, *args):
+        """
+        Filter the project list as the search text is typed
+        """
+        self.listProjects.delete(0, END)
+        for prjName in self.index.searchProjects(self.projectSearch.get()):
+            self.listProjects.insert(END, prjName)
 
-            for index, prjName in enumerate(projects):
-                button = Button(
-                    framePrjButtons,
-                    text=prjName,
-                    command=partial(lambda i=index, prj=prjName: self.
-                                    __onProjectSelect(i, prj)))
-                button.pack(side=LEFT, padx=10)
-                self.btnsProjects.append(button)
-        else:
-            # TODO: Implement input
-            prjLabel = Label(
-                self.framePrjSelect,
-                text='Too many projects to list. Write the name here:')
-            # a1 = Entry(window).place(x=80, y=50)
+    def __onRefresh(self):
+        """
+        Read the projects and the bins of the current project again
+        """
+        self.index.refresh()
+        self.__showProjects()
+        if self.selectedProject:
+            self.__cleanupWindowOnProjectChange()
+            self.__generateBinSelectionButtons(self.selectedProject)
 
-    def __onProjectSelect(self, index, prjName):
+    def __onProjectSelect(self, event):
         """
-        Action handler for project selection buttons
-        :param index: position of the button inside the btnsProjects list
-        :param prjNameing name of the project, as received from Resolve
+        Action handler for the project list
         """
-        for btn in self.btnsProjects:
-            btn['state'] = 'normal'
-        self.btnsProjects[index]['state'] = 'disabled'
+        selection = self.listProjects.curselection()
+        if not selection:
+            return
+        prjName = self.listProjects.get(selection[0])
         self.__cleanupWindowOnProjectChange()
-        self.__generateBinSelectionButtons(self.resolve.loadProject(prjName))
-
-    def __generateBinSelectionButtons(self, projectSelected):
-        """
-        Read folders from project root and generate selection buttons
-        """
-        if projectSelected:
-            self.btnsFolders = []
-            self.firstLevelFolders = self.resolve.getRootFolders()
-
-            if len(self.firstLevelFolders):
-                selectFolderLabel = Label(
-                    self.frameFolderSelect,
-                    text='Select the folder to be processed:')
-                selectFolderLabel.pack(side=TOP, anchor=N)
-
-                for index, folder in enumerate(self.firstLevelFolders):
-                    folderName = folder.GetName()
-                    button = Button(
-                        self.frameFolderSelect,
-                        text=folderName,
-                        command=partial(lambda i=index, prj=folder: self.
-                                        __onFolderSelect(i, prj)))
-                    button.pack(side=LEFT, padx=10)
-                    self.btnsFolders.append(button)
-
-    def __onFolderSelect(self, index, folder):
-        """
-        Action handler for folder selection buttons
-        :param index: position of the button inside the btnsFolders list
-        :param foldering name of the folder, as received from Resolve
-        """
-        for btn in self.btnsFolders:
-            btn['state'] = 'normal'
-        self.btnsFolders[index]['state'] = 'disabled'
-        self.selectedFolder = self.resolve.setCurrentFolder(folder)
+        if self.index.loadProject(prjName):
+            self.selectedProject = prjName
+            self.__generateBinSelectionButtons(prjName)
+
+    def __generateBinSelectionButtons(self, prjName):
+        """
+        Bin tree of the project, listed level by level as it is expanded,
+        with track counts and audio duration filled in the background
+        """
+        selectFolderLabel = Label(self.frameFolderSelect,
+                                  text='Select the folder to be processed:')
+        selectFolderLabel.pack(side=TOP, anchor=N)
+        self.binSearch = StringVar(self.window, value='')
+        binSearchEntry = Entry(self.frameFolderSelect,
+                               textvariable=self.binSearch)
+        binSearchEntry.pack(side=TOP, anchor=W, padx=5)
+        binScrollbar = Scrollbar(self.frameFolderSelect)
+        binScrollbar.pack(side=RIGHT, fill=Y)
+        self.treeBins = ttk.Treeview(self.frameFolderSelect,
+                                     columns=('tracks', 'duration'),
+                                     height=6,
+                                     selectmode='browse',
+                                     yscrollcommand=binScrollbar.set)
+        self.treeBins.heading('#0', text='Bin')
+        self.treeBins.heading('tracks', text='Tracks')
+        self.treeBins.heading('duration', text='Duration')
+        self.treeBins.column('#0', width=460)
+        self.treeBins.column('tracks', width=80, anchor=E)
+        self.treeBins.column('duration', width=100, anchor=E)
+        self.treeBins.pack(side=LEFT)
+        binScrollbar.config(command=self.treeBins.yview)
+        self.treeBins.bind('<<TreeviewOpen>>', self.__onBinOpen)
+        self.treeBins.bind('<<TreeviewSelect>>', self.__onFolderSelect)
+        self.binSearch.trace_add('write', self.__showBins)
+        self.__showBins()
+
+    def __showBins(self, *args):
+        """
+        Whole tree when the search text is empty, matching bins otherwise
+        """
+        self.treeBins.delete(*self.treeBins.get_children())
+        searchText = self.binSearch.get()
+        if searchText:
+            self.__insertBins(
+                '', self.index.searchBins(self.selectedProject, searchText),
+                showPath=True)
+        else:
+            self.__insertBins('', self.index.getBins(self.selectedProject))
+
+    def __insertBins(self, parent, nodes, showPath=False):
+        for node in nodes:
+            self.treeBins.insert(parent,
+                                 END,
+                                 iid=node['path'],
+                                 text=node['path'] if showPath else node['name'],
+                                 values=self.__formatBinStats(node))
+            if not showPath and node['children'] != []:
+                """Placeholder making the bin expandable until it is listed"""
+                self.treeBins.insert(node['path'], END)
+        self.index.requestBinStats(
+            self.selectedProject,
+            [node['path'] for node in nodes if node['tracks'] is None])
+
+    def __formatBinStats(self, node):
+        if node['tracks'] is None:
+            return ('...', '...')
+        return (node['tracks'], formatDuration(node['seconds']))
+
+    def __onBinOpen(self, event):
+        path = self.treeBins.focus()
+        if self.binSearch.get() or not path or self.engine:
+            return
+        self.treeBins.delete(*self.treeBins.get_children(path))
+        self.__insertBins(path, self.index.getBins(self.selectedProject,
+                                                   path))
+
+    def __processIndexEvents(self):
+        """
+        Show the bin statistics computed in the background
+        """
+        while True:
+            try:
+                event = self.indexEvents.get_nowait()
+            except Empty:
+                break
+            if (event['type'] == 'binStats'
+                    and event['project'] == self.selectedProject
+                    and self.treeBins and self.treeBins.winfo_exists()
+                    and self.treeBins.exists(event['path'])):
+                self.treeBins.item(event['path'],
+                                   values=(event['tracks'],
+                                           formatDuration(event['seconds'])))
+
+        self.window.after(200, self.__processIndexEvents)
+
+    def __onFolderSelect(self, event):
+        """
+        Action handler for the bin tree
+        """
+        path = self.treeBins.focus()
+        if not path:
+            return
+        self.selectedFolder = self.index.selectBin(self.selectedProject, path)
         self.__cleanupWindowOnFolderChange()
-        self.__getFolderContents()
+        if self.selectedFolder:
+            self.__getFolderContents()
 
     def __getFolderContents(self):
         """
@@ -155,6 +275,7 @@ class ResolveAutomation:
         outputFolderPath.pack(side=LEFT)
 
         def __browseOutputFolder():
+            from tkinter import filedialog
             self.outputPath = filedialog.askdirectory() + '/'
             outputFolderPath.delete(0, END)
             outputFolderPath.insert(0, self.outputPath)
@@ -178,73 +299,114 @@ class ResolveAutomation:
                                  command=self.__cancelProcessing)
         self.buttonStop.pack(padx=5, pady=15, side=RIGHT)
         self.buttonStop['state'] = 'disabled'
+        self.checkRenderVideoOnce = Checkbutton(
+            self.frameProcessFolder,
+            text='Render video once',
+            variable=self.renderVideoOnce)
+        self.checkRenderVideoOnce.pack(padx=5, pady=15, side=LEFT)
+        self.checkBatchRender = Checkbutton(self.frameProcessFolder,
+                                            text='Render whole folder at once',
+                                            variable=self.batchRender)
+        self.checkBatchRender.pack(padx=5, pady=15, side=LEFT)
+        self.checkSingleJobRender = Checkbutton(
+            self.frameProcessFolder,
+            text='Render final file directly',
+            variable=self.singleJobRender)
+        self.checkSingleJobRender.pack(padx=5, pady=15, side=LEFT)
+        self.checkReuseTimeline = Checkbutton(self.frameProcessFolder,
+                                              text='Reuse one timeline',
+                                              variable=self.reuseTimeline)
+        self.checkReuseTimeline.pack(padx=5, pady=15, side=LEFT)
 
     def __startProcessing(self):
         self.buttonProcess['state'] = 'disabled'
         self.buttonStop['state'] = 'normal'
-        self.resolve.removeExistingAutomations()
         self.progressBar['value'] = 0
-        self.progressBar['maximum'] = len(self.clipsInFolder['audioClips'])
-        self.window.poll = True
-        self.__processFolder()
+        self.progressBar['maximum'] = 100
+        self.__setBrowserState('disabled')
+        self.engine = BatchEngine(self.resolve,
+                                  outputPath=self.outputPath,
+                                  renderVideoOnce=self.renderVideoOnce.get(),
+                                  batchRender=self.batchRender.get(),
+                                  singleJobRender=self.singleJobRender.get(),
+                                  reuseTimeline=self.reuseTimeline.get(),
+                                  maxConcurrentMuxes=self.MAX_CONCURRENT_MUXES,
+                                  maxTempBytes=self.MAX_TEMP_BYTES,
+                                  muxAudioCodec=self.MUX_AUDIO_CODEC,
+                                  muxAudioBitrate=self.MUX_AUDIO_BITRATE,
+                                  cachePath=self.CACHE_PATH,
+                                  cacheMaxBytes=self.CACHE_MAX_BYTES,
+                                  onEvent=self.engineEvents.put)
+        Thread(target=self.__runEngine, args=(self.engine, ),
+               daemon=True).start()
+        self.__processEngineEvents()
+
+    def __runEngine(self, engine):
+        """
+        Hold the project index while the engine drives Resolve, so the bin
+        statistics computed in the background wait for the run to end
+        """
+        with self.index.lock:
+            engine.run()
+
+    def __setBrowserState(self, state):
+        """
+        Lock the project and bin selection while the engine runs, selecting
+        another project would load it in the middle of a render
+        """
+        for frame in (self.framePrjSelect, self.frameFolderSelect):
+            for widget in frame.winfo_children():
+                if isinstance(widget, ttk.Treeview):
+                    widget['selectmode'] = ('browse'
+                                            if state == 'normal' else 'none')
+                elif 'state' in widget.keys():
+                    widget['state'] = state
 
     def __cancelProcessing(self):
-        self.window.poll = False
-        self.buttonProcess['state'] = 'normal'
+        """START comes back with the 'finished' event, once the engine is done"""
+        self.engine.cancel()
         self.buttonStop['state'] = 'disabled'
+        self.statusLabel['text'] = ('Cancelling, aborting the current render '
+                                    'and finishing the queued muxes...')
 
-    def __processFolder(self):
-        """
-        Process one audio file from the media pool
-        """
-        if self.window.poll:
-            if len(self.clipsInFolder['audioClips']) and self.outputPath:
-                self.progressBar['value'] += 1
-                """Add audio file to an empty timeline"""
-                currentAudioFile = self.clipsInFolder['audioClips'][0]
-                currentTrackName = currentAudioFile.GetName()[:-4]
-                currentAudioTrackName = currentTrackName + ' AUDIO'
-                currentVideoTrackName = currentTrackName + ' VIDEO'
-                """Add the audio track to timeline and create audio-only render job"""
-                tl = self.resolve.createTimelineFromAudio(currentAudioFile)
-                """Calculate how many times to repeat the video clip"""
-                timelineFrames = int(tl['duration'])
-                videoFile = self.clipsInFolder['videoClips'][0]
-                videoFrames = int(videoFile.GetClipProperty('Frames'))
-                videoClipInstances = floor(timelineFrames / videoFrames)
-                videoClipFragments = timelineFrames - (videoClipInstances *
-                                                       videoFrames)
-                """Append full video clips to the timeline"""
-                for time in range(videoClipInstances):
-                    self.resolve.addVideoClipToTimeline(videoFile)
-
-                if videoClipFragments:
-                    self.resolve.addVideoClipToTimeline(
-                        videoFile, videoClipFragments)
-                """Create a compound video and add it to an empty timeline"""
-                self.resolve.createCompoundVideo()
-                """Create the render job"""
-                self.resolve.createRenderJob(
-                    targetDir=self.outputPath,
-                    renderVideoFileName=currentVideoTrackName,
-                    renderAudioFileName=currentAudioTrackName)
-                """Wait for render job to complete"""
-                while self.resolve.checkIsRendering():
-                    sleep(10)
-                else:
-                    video = ffmpeg.input(
-                        f'{self.outputPath}/{currentVideoTrackName}.mov')
-                    audio = ffmpeg.input(
-                        f'{self.outputPath}/{currentAudioTrackName}.mov')
-                    output = f'{self.outputPath}/{currentTrackName}.mp4'
-                    ffmpeg.concat(video, audio, v=1, a=1).output(output).run()
-                    """Remove temporary files"""
-                    rm(f'{self.outputPath}/{currentVideoTrackName}.mov')
-                    rm(f'{self.outputPath}/{currentAudioTrackName}.mov')
-                    self.resolve.moveFinishedFileToRoot(currentAudioFile)
-                    self.clipsInFolder['audioClips'].pop(0)
-                    """Process next file"""
-                    self.window.after(1000, self.__processFolder)
+    def __processEngineEvents(self):
+        """
+        Show the progress of the engine, which runs outside the Tk thread
+        """
+        while True:
+            try:
+                event = self.engineEvents.get_nowait()
+            except Empty:
+                break
+            if event['type'] == 'progress':
+                self.progressBar['value'] = event['percentage']
+                self.statusLabel['text'] = (
+                    f'{event["percentage"]:.1f}% - {event["fps"]:.1f} fps - '
+                    f'{formatDuration(event["eta"])} left')
+            elif event['type'] == 'trackMuxed':
+                self.statusLabel['text'] = (
+                    f'{event["trackName"]}: '
+                    f'{event["bytes"] / 1048576:.1f} MB written '
+                    f'in {event["seconds"]:.1f} s')
+            elif event['type'] == 'cacheHit':
+                self.statusLabel['text'] = f'{event["trackName"]}: cache hit'
+            elif event['type'] == 'trackRendered':
+                self.statusLabel['text'] = f'{event["trackName"]}: rendered'
+            elif event['type'] == 'trackFailed':
+                self.statusLabel['text'] = (f'{event["trackName"]}: failed '
+                                            f'{event.get("message", "")}')
+            elif event['type'] == 'projectGrowth':
+                self.statusLabel['text'] = (
+                    f'{event["remaining"]} timeline(s) and compound '
+                    f'clip(s) left in the project')
+            elif event['type'] == 'finished':
+                self.buttonProcess['state'] = 'normal'
+                self.buttonStop['state'] = 'disabled'
+                self.engine = None
+                self.__setBrowserState('normal')
+                return
+
+        self.window.after(200, self.__processEngineEvents)
 
     def __cleanupWindowOnProjectChange(self):
         """
@@ -270,16 +432,6 @@ class ResolveAutomation:
 
 
 if __name__ == '__main__':
-    env.update({
-        'RESOLVE_SCRIPT_API':
-        '/Library/Application Support/Blackmagic Design/DaVinci Resolve/Developer/Scripting'
-    })
-    env.update({
-        'RESOLVE_SCRIPT_LIB':
-        '/Applications/DaVinci Resolve/DaVinci Resolve.app/Contents/Libraries/Fusion/fusionscript.so'
-    })
-    env.update({'PYTHONPATH': '$PYTHONPATH:$RESOLVE_SCRIPT_API/Modules/'})
+    configureScriptEnvironment()
 
     buildVideos = ResolveAutomation()
-else:
-    print('This is an application. It can\'t be imported as a module')
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+from threading import Event, Thread
+from time import monotonic
+
+
+class RenderMonitor(Thread):
+    """
+    Poll the status of Resolve render jobs off the UI thread and report
+    progress and completion through a queue
+    """
+    FINISHED_STATUSES = ('Complete', 'Failed', 'Cancelled')
+
+    def __init__(self, resolve, jobIds, events, minInterval=0.5,
+                 maxInterval=10):
+        """
+        :param resolve: DaVinciResolve instance owning the render jobs
+        :param jobIds: render jobs to wait for
+        :param events: queue receiving 'progress', 'jobComplete' and
+        'finished' events, or an 'error' event when polling failed
+        :param minInterval: shortest wait between polls, near the expected end
+        :param maxInterval: longest wait between polls, early in the render
+        """
+        super().__init__(daemon=True)
+        self.resolve = resolve
+        self.jobIds = list(jobIds)
+        self.events = events
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.stopped = Event()
+        self.interval = minInterval
+
+    def run(self):
+        try:
+            self.__poll()
+        except Exception as error:
+            """Lost Resolve, let the waiting thread know"""
+            self.events.put({'type': 'error', 'error': error})
+
+    def __poll(self):
+        started = monotonic()
+        statuses = {}
+        remaining = list(self.jobIds)
+
+        while remaining and not self.stopped.is_set():
+            percentages = []
+            for jobId in list(remaining):
+                status = self.resolve.getRenderJobStatus(jobId) or {}
+                jobStatus = status.get('JobStatus')
+                if jobStatus in self.FINISHED_STATUSES:
+                    remaining.remove(jobId)
+                    statuses[jobId] = jobStatus
+                    self.events.put({
+                        'type': 'jobComplete',
+                        'jobId': jobId,
+                        'status': jobStatus
+                    })
+                else:
+                    percentage = status.get('CompletionPercentage', 0)
+                    percentages.append(percentage)
+                    self.events.put({
+                        'type': 'progress',
+                        'jobId': jobId,
+                        'percentage': percentage
+                    })
+
+            if remaining:
+                self.stopped.wait(
+                    self.__nextInterval(percentages, monotonic() - started))
+
+        self.events.put({'type': 'finished', 'statuses': statuses})
+
+    def stop(self):
+        self.stopped.set()
+
+    def __nextInterval(self, percentages, elapsed):
+        """
+        Poll rarely early in the render and often near its expected end
+        """
+        progress = max(percentages, default=0)
+        if progress <= 0:
+            """No estimate yet, back off from the shortest interval"""
+            interval = self.interval
+            self.interval = min(self.maxInterval, interval * 2)
+            return interval
+        self.interval = self.minInterval
+        expectedRemaining = elapsed * (100 - progress) / progress
+
+        return min(self.maxInterval, max(self.minInterval,
+                                         expectedRemaining / 4))
+
+
+if __name__ == '__main__':
+    pass
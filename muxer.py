@@ -0,0 +1,84 @@
+#!/usr/bin/python
+from os.path import getsize
+from time import monotonic
+
+
+def muxVideoAudio(videoPath,
+                  audioPath,
+                  outputPath,
+                  audioCodec='copy',
+                  audioBitrate=None):
+    """
+    Mux the video stream of one file and the audio stream of another, without
+    re-encoding the video
+    :param videoPath: video-only render
+    :param audioPath: audio-only render
+    :param outputPath: final container
+    :param audioCodec: audio codec of the output container, 'copy' to keep it
+    :param audioBitrate: audio bitrate (e.g. '320k'), None for codec default
+    :return: bytes written and mux duration in seconds
+    """
+    import ffmpeg
+    video = ffmpeg.input(videoPath)
+    audio = ffmpeg.input(audioPath)
+
+    return __runMux(video, audio, outputPath, audioCodec, audioBitrate)
+
+
+def muxLoopedVideo(loopVideoPath,
+                   audioPath,
+                   outputPath,
+                   frames,
+                   audioCodec='aac',
+                   audioBitrate=None):
+    """
+    Loop a pre-rendered video with stream copy and mux it with an audio file
+    :param loopVideoPath: video rendered once by Resolve
+    :param audioPath: source audio file
+    :param outputPath: final container
+    :param frames: length of the output, in timeline frames
+    :param audioCodec: audio codec of the output container
+    :param audioBitrate: audio bitrate (e.g. '320k'), None for codec default
+    :return: bytes written and mux duration in seconds
+    """
+    import ffmpeg
+    video = ffmpeg.input(loopVideoPath, stream_loop=-1)
+    audio = ffmpeg.input(audioPath)
+
+    return __runMux(video, audio, outputPath, audioCodec, audioBitrate,
+                    {'vframes': frames})
+
+
+def __runMux(video, audio, outputPath, audioCodec, audioBitrate,
+             extraOptions=None):
+    import ffmpeg
+    outputOptions = {'vcodec': 'copy', 'acodec': audioCodec}
+    if audioBitrate and audioCodec != 'copy':
+        outputOptions['audio_bitrate'] = audioBitrate
+    if extraOptions:
+        outputOptions.update(extraOptions)
+
+    start = monotonic()
+    ffmpeg.output(video['v'], audio['a'], outputPath,
+                  **outputOptions).overwrite_output().run()
+
+    return {
+        'path': outputPath,
+        'bytes': getsize(outputPath),
+        'seconds': monotonic() - start
+    }
+
+
+def probeDuration(filePath):
+    """
+    :return: duration of a media file in seconds, None when it is unreadable
+    """
+    import ffmpeg
+    try:
+        return float(ffmpeg.probe(filePath)['format']['duration'])
+    except (ffmpeg.Error, OSError, KeyError, ValueError):
+        return None
+
+
+if __name__ == '__main__':
+    pass
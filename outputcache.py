@@ -0,0 +1,130 @@
+#!/usr/bin/python
+from hashlib import sha256
+from json import dump, load
+from os import makedirs, remove as rm, stat
+from os.path import exists, getsize, join, splitext
+from shutil import move
+from threading import Lock
+from time import time
+
+
+def mediaIdentity(filePath):
+    """
+    :return: path, size and modification time of a file, None if missing
+    """
+    try:
+        fileStat = stat(filePath)
+    except (OSError, TypeError):
+        return None
+
+    return f'{filePath}|{fileStat.st_size}|{fileStat.st_mtime}'
+
+
+class OutputCache:
+    """
+    Content-addressed cache of rendered files, keyed on the identity of the
+    source media and the render settings
+    """
+    INDEX_FILE_NAME = 'index.json'
+
+    def __init__(self, storePath, maxBytes=20 * 1024**3):
+        """
+        :param storePath: folder holding reusable intermediates and the index
+        :param maxBytes: size of the stored intermediates, least recently used
+        ones are evicted above it
+        """
+        self.storePath = storePath
+        self.maxBytes = maxBytes
+        self.lock = Lock()
+        self.index = {'intermediates': {}, 'outputs': {}}
+
+        makedirs(storePath, exist_ok=True)
+        if exists(self.__indexPath()):
+            with open(self.__indexPath()) as indexFile:
+                self.index = load(indexFile)
+
+    @staticmethod
+    def makeKey(*parts):
+        """
+        :return: cache key of the given identities and settings, None when one
+        of the source files is missing
+        """
+        if None in parts:
+            return None
+
+        return sha256('\n'.join(str(part) for part in parts).encode()).hexdigest()
+
+    def getOutput(self, key):
+        """
+        :return: path of the output made with this key, if it is unchanged
+        """
+        with self.lock:
+            entry = self.index['outputs'].get(key)
+        if entry and mediaIdentity(entry['path']) == entry['identity']:
+            return entry['path']
+
+        return None
+
+    def recordOutput(self, key, outputPath):
+        with self.lock:
+            self.index['outputs'][key] = {
+                'path': outputPath,
+                'identity': mediaIdentity(outputPath)
+            }
+            self.__saveIndex()
+
+    def getIntermediate(self, key):
+        """
+        :return: stored file for this key, None on a cache miss
+        """
+        with self.lock:
+            entry = self.index['intermediates'].get(key)
+            if not entry or not exists(entry['path']):
+                return None
+            entry['lastUsed'] = time()
+            self.__saveIndex()
+
+            return entry['path']
+
+    def putIntermediate(self, key, filePath):
+        """
+        Move a file into the store and evict the least recently used ones
+        :return: new path of the file
+        """
+        storedPath = join(self.storePath, key + splitext(filePath)[1])
+        move(filePath, storedPath)
+
+        with self.lock:
+            self.index['intermediates'][key] = {
+                'path': storedPath,
+                'bytes': getsize(storedPath),
+                'lastUsed': time()
+            }
+            self.__evict(key)
+            self.__saveIndex()
+
+        return storedPath
+
+    def __evict(self, keepKey):
+        entries = self.index['intermediates']
+        storedBytes = sum(entry['bytes'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['lastUsed']):
+            if storedBytes <= self.maxBytes:
+                break
+            if key == keepKey:
+                continue
+            storedBytes -= entries[key]['bytes']
+            if exists(entries[key]['path']):
+                rm(entries[key]['path'])
+            del entries[key]
+
+    def __indexPath(self):
+        return join(self.storePath, self.INDEX_FILE_NAME)
+
+    def __saveIndex(self):
+        with open(self.__indexPath(), 'w') as indexFile:
+            dump(self.index, indexFile)
+
+
+if __name__ == '__main__':
+    pass
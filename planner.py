@@ -0,0 +1,88 @@
+#!/usr/bin/python
+from concurrent.futures import ThreadPoolExecutor
+from json import dump, load
+from os import stat
+from os.path import exists
+from threading import Lock
+
+
+class DurationPlanner:
+    """
+    Probe the duration of every audio file up front with ffprobe, so the
+    workload of a whole folder is known before any timeline is created
+    """
+
+    def __init__(self, cachePath=None, maxWorkers=8):
+        """
+        :param cachePath: JSON file keeping probed durations between runs, None
+        to keep them in memory only
+        :param maxWorkers: ffprobe processes running at once
+        """
+        self.cachePath = cachePath
+        self.maxWorkers = maxWorkers
+        self.lock = Lock()
+        self.durations = {}
+        self.errorMessages = []
+
+        if cachePath and exists(cachePath):
+            with open(cachePath) as cacheFile:
+                self.durations = load(cacheFile)
+
+    def planFrames(self, filePaths, frameRate):
+        """
+        :param filePaths: audio files to probe
+        :param frameRate: timeline frame rate the durations are converted to
+        :return: duration in timeline frames for each path, None when the file
+        could not be probed
+        """
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            seconds = list(executor.map(self.getDuration, filePaths))
+        self.saveCache()
+
+        return {
+            path: round(duration * frameRate) if duration else None
+            for path, duration in zip(filePaths, seconds)
+        }
+
+    def getDuration(self, filePath):
+        """
+        :return: duration in seconds, from cache while the file is unchanged
+        """
+        try:
+            fileStat = stat(filePath)
+        except (OSError, TypeError) as error:
+            self.__addError(filePath, error)
+            return None
+        cacheKey = f'{filePath}|{fileStat.st_size}|{fileStat.st_mtime}'
+
+        with self.lock:
+            if cacheKey in self.durations:
+                return self.durations[cacheKey]
+
+        import ffmpeg
+        try:
+            duration = float(ffmpeg.probe(filePath)['format']['duration'])
+        except (ffmpeg.Error, OSError, KeyError, ValueError) as error:
+            self.__addError(filePath, error)
+            return None
+
+        with self.lock:
+            self.durations[cacheKey] = duration
+
+        return duration
+
+    def saveCache(self):
+        if self.cachePath:
+            with self.lock, open(self.cachePath, 'w') as cacheFile:
+                dump(self.durations, cacheFile)
+
+    def __addError(self, filePath, error):
+        with self.lock:
+            self.errorMessages.append({
+                'type': 'probe_failed',
+                'message': f'Could not probe {filePath}: {error}'
+            })
+
+
+if __name__ == '__main__':
+    pass
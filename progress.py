@@ -0,0 +1,139 @@
+#!/usr/bin/python
+from collections import deque
+from threading import Lock
+from time import monotonic
+
+
+class ProgressModel:
+    """
+    Progress of a whole bin in timeline frames, from the planned length of
+    the pending tracks and the completion percentage of their render jobs,
+    with a rolling throughput and the time left
+    """
+
+    def __init__(self, window=60):
+        """
+        :param window: seconds of history the throughput is averaged over
+        """
+        self.window = window
+        self.lock = Lock()
+        self.trackFrames = {}
+        self.trackJobs = {}
+        self.jobPercentages = {}
+        self.jobTracks = {}
+        self.trackDone = {}
+        self.totalFrames = 0
+        self.doneFrames = 0
+        self.processedFrames = 0
+        self.started = monotonic()
+        self.samples = deque([(self.started, 0)])
+
+    def addTrack(self, trackName, frames):
+        """
+        Count a pending track, or update its length once it is known
+        """
+        with self.lock:
+            frames = frames or 0
+            change = frames - self.trackFrames.get(trackName, 0)
+            self.totalFrames += change
+            self.doneFrames += self.trackDone.get(trackName, 0) * change
+            self.trackFrames[trackName] = frames
+
+    def removeTrack(self, trackName):
+        """
+        Leave out a track that will not be rendered, skipped or failed
+        """
+        with self.lock:
+            frames = self.trackFrames.pop(trackName, 0)
+            self.totalFrames -= frames
+            self.doneFrames -= self.trackDone.pop(trackName, 0) * frames
+            for jobId in self.trackJobs.pop(trackName, []):
+                self.jobPercentages.pop(jobId, None)
+                self.jobTracks.pop(jobId, None)
+
+    def setJobs(self, trackName, jobIds):
+        """
+        Register the render jobs of a track, each covering all its frames
+        """
+        with self.lock:
+            self.trackJobs[trackName] = list(jobIds)
+            for jobId in jobIds:
+                self.jobTracks[jobId] = trackName
+                self.jobPercentages[jobId] = 0
+
+    def onJobProgress(self, jobId, percentage):
+        with self.lock:
+            trackName = self.jobTracks.get(jobId)
+            if trackName is None:
+                return
+            self.jobPercentages[jobId] = max(percentage or 0,
+                                             self.jobPercentages[jobId])
+            jobIds = self.trackJobs[trackName]
+            self.__setDone(
+                trackName,
+                sum(self.jobPercentages[jobId]
+                    for jobId in jobIds) / (100 * len(jobIds)))
+
+    def completeTrack(self, trackName):
+        """
+        Count all the frames of a finished track, rendered or muxed
+        """
+        with self.lock:
+            self.__setDone(trackName, 1)
+
+    def getSnapshot(self):
+        """
+        :return: frames done and planned, bin percentage, rolling frames per
+        second and estimated seconds left, None until there is a rate
+        """
+        with self.lock:
+            self.__addSample()
+            (firstTime, firstFrames), (lastTime, lastFrames) = (
+                self.samples[0], self.samples[-1])
+            fps = (lastFrames - firstFrames) / (
+                lastTime - firstTime) if lastTime > firstTime else 0
+            remainingFrames = self.totalFrames - self.doneFrames
+
+            return {
+                'doneFrames': int(self.doneFrames),
+                'totalFrames': self.totalFrames,
+                'percentage': 100 * self.doneFrames /
+                self.totalFrames if self.totalFrames else 0,
+                'fps': fps,
+                'eta': remainingFrames / fps if fps > 0 else None,
+                'elapsed': lastTime - self.started
+            }
+
+    def __setDone(self, trackName, fraction):
+        """
+        Move the frames done by a track to fraction of its length
+        """
+        frames = self.trackFrames.get(trackName, 0)
+        previous = self.trackDone.get(trackName, 0)
+        self.trackDone[trackName] = fraction
+        self.doneFrames += (fraction - previous) * frames
+        """Work done stays counted in the throughput, even if undone"""
+        self.processedFrames += max(0, fraction - previous) * frames
+
+    def __addSample(self):
+        """Keep the frames processed over the last window, one per snapshot"""
+        now = monotonic()
+        self.samples.append((now, self.processedFrames))
+        while len(self.samples) > 2 and self.samples[1][0] < now - self.window:
+            self.samples.popleft()
+
+
+def formatDuration(seconds):
+    """
+    :return: seconds as H:MM:SS, or '--:--' when unknown
+    """
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    return f'{hours}:{minutes:02}:{seconds:02}'
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from os import remove as rm
+from os.path import exists, getsize
+from threading import Lock
+from time import monotonic
+
+
+class MuxScheduler:
+    """
+    Bounded worker pool running mux and cleanup jobs in the background, so the
+    next render can be queued in Resolve while ffmpeg is still working
+    """
+
+    def __init__(self, maxConcurrentMuxes=2, maxTempBytes=None):
+        """
+        :param maxConcurrentMuxes: how many ffmpeg muxes may run at once
+        :param maxTempBytes: temporary disk the pending jobs may hold, None for
+        no limit
+        """
+        self.maxTempBytes = maxTempBytes
+        self.executor = ThreadPoolExecutor(max_workers=maxConcurrentMuxes)
+        self.lock = Lock()
+        self.tempBytes = 0
+        self.pending = {}
+        self.errorMessages = []
+
+    def submit(self, job, tempFiles=(), tag=None):
+        """
+        Queue a mux job, blocking while the temp disk budget is exhausted
+        :param job: callable running the mux, its result is handed back by
+        collectFinished
+        :param tempFiles: files removed once the job succeeded
+        :param tag: caller data handed back with the result
+        """
+        jobBytes = sum(getsize(path) for path in tempFiles if exists(path))
+        self.waitForTempSpace(jobBytes)
+
+        with self.lock:
+            self.tempBytes += jobBytes
+        future = self.executor.submit(self.__run, job, tempFiles, jobBytes)
+        self.pending[future] = tag
+
+    def waitForTempSpace(self, jobBytes):
+        """
+        Block until the running jobs free enough temp disk for jobBytes; a job
+        larger than the whole budget only waits for the disk to be empty
+        """
+        while self.maxTempBytes and self.tempBytes and (
+                self.tempBytes + jobBytes > self.maxTempBytes):
+            """Finished jobs stay pending until collected, don't wait on them"""
+            running = [future for future in self.pending if not future.done()]
+            if not running:
+                break
+            wait(running, return_when=FIRST_COMPLETED)
+
+    def collectFinished(self):
+        """
+        :return: (tag, result) for every job finished since the last call
+        """
+        finished = []
+        for future in [f for f in self.pending if f.done()]:
+            tag = self.pending.pop(future)
+            try:
+                finished.append((tag, future.result()))
+            except Exception as error:
+                self.errorMessages.append({
+                    'type': 'mux_failed',
+                    'message': f'Mux failed: {error}',
+                    'tag': tag
+                })
+
+        return finished
+
+    def shutdown(self):
+        """
+        Wait for every queued job and return the ones not collected yet
+        """
+        wait(list(self.pending))
+        finished = self.collectFinished()
+        self.executor.shutdown()
+
+        return finished
+
+    def __run(self, job, tempFiles, jobBytes):
+        try:
+            result = job()
+            started = monotonic()
+            for path in tempFiles:
+                rm(path)
+            if isinstance(result, dict):
+                result['cleanupSeconds'] = monotonic() - started
+            return result
+        finally:
+            with self.lock:
+                self.tempBytes -= jobBytes
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,228 @@
+#!/usr/bin/python
+from contextlib import contextmanager
+from functools import wraps
+from json import dumps
+from statistics import quantiles
+from threading import Lock, local
+from time import monotonic, time
+
+
+class ApiProxy:
+    """
+    Stand-in for a Resolve scripting object counting every call made through
+    it, and wrapping the objects it returns so their calls are counted too
+    """
+
+    def __init__(self, target, tracer):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_tracer', tracer)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self._tracer.countApiCall()
+            return self._tracer.wrap(
+                attribute(*self._tracer.unwrap(args),
+                          **self._tracer.unwrap(kwargs)))
+
+        return call
+
+    def __eq__(self, other):
+        return self._target == unwrapProxy(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __bool__(self):
+        return bool(self._target)
+
+
+def unwrapProxy(value):
+    return value._target if isinstance(value, ApiProxy) else value
+
+
+class Tracer:
+    """
+    Per-stage wall time, Resolve API round trips and bytes written, saved as
+    JSON lines and as a Prometheus textfile
+    """
+    PLAIN_TYPES = (str, int, float, bool, bytes, type(None))
+
+    def __init__(self, jsonlPath=None, prometheusPath=None):
+        """
+        :param jsonlPath: file receiving one JSON record per span
+        :param prometheusPath: textfile collector file written at the end
+        """
+        self.jsonlPath = jsonlPath
+        self.prometheusPath = prometheusPath
+        self.lock = Lock()
+        self.threadCalls = local()
+        self.apiCalls = 0
+        self.records = []
+        self.jsonlFile = None
+
+    def instrument(self, resolve):
+        """
+        Trace every public method of a DaVinciResolve instance and count the
+        API calls of the scripting objects it holds
+        """
+        if getattr(resolve, 'tracer', None) is self:
+            return resolve
+        for name in dir(resolve):
+            method = getattr(resolve, name)
+            if not name.startswith('_') and callable(method):
+                setattr(resolve, name, self.__traceMethod(name, method))
+
+        for name in ('resolve', 'pm', 'mediaStorage', 'selectedProject',
+                     'mediaPool', 'rootFolder', 'selectedFolder'):
+            setattr(resolve, name, self.wrap(getattr(resolve, name)))
+        resolve.tracer = self
+
+        return resolve
+
+    def wrap(self, value):
+        if isinstance(value, (self.PLAIN_TYPES, ApiProxy)):
+            return value
+        if isinstance(value, list):
+            return [self.wrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.wrap(item) for key, item in value.items()}
+
+        return ApiProxy(value, self)
+
+    def unwrap(self, value):
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.unwrap(item) for item in value)
+        if isinstance(value, dict):
+            return {key: self.unwrap(item) for key, item in value.items()}
+
+        return unwrapProxy(value)
+
+    def countApiCall(self):
+        with self.lock:
+            self.apiCalls += 1
+        self.threadCalls.count = getattr(self.threadCalls, 'count', 0) + 1
+
+    @contextmanager
+    def span(self, stage, trackName=None):
+        """
+        Time a stage and count the API calls made by this thread meanwhile
+        """
+        started = monotonic()
+        apiCalls = getattr(self.threadCalls, 'count', 0)
+        try:
+            yield
+        finally:
+            self.record(stage,
+                        trackName,
+                        seconds=monotonic() - started,
+                        apiCalls=getattr(self.threadCalls, 'count', 0) -
+                        apiCalls)
+
+    def record(self, stage, trackName=None, seconds=0, apiCalls=0,
+               bytesWritten=0):
+        entry = {
+            'time': time(),
+            'stage': stage,
+            'track': trackName,
+            'seconds': seconds,
+            'apiCalls': apiCalls,
+            'bytes': bytesWritten
+        }
+        with self.lock:
+            self.records.append(entry)
+            if self.jsonlPath:
+                if not self.jsonlFile:
+                    self.jsonlFile = open(self.jsonlPath, 'a')
+                self.jsonlFile.write(dumps(entry) + '\n')
+                self.jsonlFile.flush()
+
+    def summary(self):
+        """
+        :return: count, total and p50/p95 wall time, API calls and bytes per
+        stage
+        """
+        stages = {}
+        with self.lock:
+            for entry in self.records:
+                stages.setdefault(entry['stage'], []).append(entry)
+
+        return {
+            stage: {
+                'count': len(entries),
+                'seconds': sum(entry['seconds'] for entry in entries),
+                'p50': self.__percentile(entries, 50),
+                'p95': self.__percentile(entries, 95),
+                'apiCalls': sum(entry['apiCalls'] for entry in entries),
+                'bytes': sum(entry['bytes'] for entry in entries)
+            }
+            for stage, entries in stages.items()
+        }
+
+    def close(self):
+        """
+        Write the Prometheus textfile and return the summary of all the spans
+        recorded so far; recording may go on afterwards
+        """
+        summary = self.summary()
+        if self.prometheusPath:
+            self.__writePrometheus(summary)
+        with self.lock:
+            if self.jsonlFile:
+                self.jsonlFile.close()
+                self.jsonlFile = None
+
+        return summary
+
+    def __traceMethod(self, name, method):
+
+        @wraps(method)
+        def traced(*args, **kwargs):
+            with self.span(f'resolve.{name}'):
+                return method(*args, **kwargs)
+
+        return traced
+
+    def __percentile(self, entries, percent):
+        durations = sorted(entry['seconds'] for entry in entries)
+        if len(durations) < 2:
+            return durations[0]
+
+        return quantiles(durations, n=100, method='inclusive')[percent - 1]
+
+    def __writePrometheus(self, summary):
+        lines = [
+            '# TYPE resolve_automation_stage_seconds summary',
+        ]
+        for stage, stats in summary.items():
+            label = f'stage="{stage}"'
+            lines += [
+                f'resolve_automation_stage_seconds{{{label},quantile="0.5"}} '
+                f'{stats["p50"]}',
+                f'resolve_automation_stage_seconds{{{label},quantile="0.95"}} '
+                f'{stats["p95"]}',
+                f'resolve_automation_stage_seconds_sum{{{label}}} '
+                f'{stats["seconds"]}',
+                f'resolve_automation_stage_seconds_count{{{label}}} '
+                f'{stats["count"]}',
+            ]
+        lines.append('# TYPE resolve_automation_api_calls_total counter')
+        lines += [
+            f'resolve_automation_api_calls_total{{stage="{stage}"}} '
+            f'{stats["apiCalls"]}' for stage, stats in summary.items()
+        ]
+        lines.append('# TYPE resolve_automation_bytes_written_total counter')
+        lines += [
+            f'resolve_automation_bytes_written_total{{stage="{stage}"}} '
+            f'{stats["bytes"]}' for stage, stats in summary.items()
+        ]
+
+        with open(self.prometheusPath, 'w') as prometheusFile:
+            prometheusFile.write('\n'.join(lines) + '\n')
+
+
+if __name__ == '__main__':
+    pass
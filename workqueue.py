@@ -0,0 +1,174 @@
+#!/usr/bin/python
+from argparse import ArgumentParser
+from json import load
+from os import makedirs
+import sys
+
+from davinci import DaVinciResolve, configureScriptEnvironment
+from engine import BatchEngine, addEngineArguments, getEngineOptions, printEvent
+
+
+class WorkQueue:
+    """
+    Bins of several projects processed in a single run, grouped per project
+    so every project is loaded only once
+    """
+
+    def __init__(self, resolve, outputPath, engineOptions=None, onEvent=None):
+        """
+        :param resolve: DaVinciResolve instance
+        :param outputPath: default output folder, each bin renders into
+        <outputPath>/<project>/<bin path>/
+        :param engineOptions: BatchEngine keyword arguments used for every bin
+        :param onEvent: callable receiving queue and engine events
+        """
+        self.resolve = resolve
+        self.outputPath = outputPath.rstrip('/')
+        self.engineOptions = engineOptions or {}
+        self.onEvent = onEvent or (lambda event: None)
+        self.projects = {}
+        self.engine = None
+        self.cancelled = False
+
+    def addBin(self, projectName, binPath, outputPath=None):
+        """
+        Queue one bin, given by its path from the media pool root
+        """
+        self.projects.setdefault(projectName, []).append({
+            'binPath': binPath.strip('/'),
+            'outputPath': outputPath
+        })
+
+    def addProject(self, projectName, outputPath=None):
+        """
+        Queue every bin of a project, discovered recursively when it is loaded
+        """
+        self.projects.setdefault(projectName, []).append({
+            'binPath': None,
+            'outputPath': outputPath
+        })
+
+    def addManifest(self, manifestPath):
+        """
+        Queue the work listed in a JSON manifest:
+        [{"project": "Name", "bins": ["Bin", "Parent/Child"], "output": "..."}]
+        where "bins" and "output" are optional
+        """
+        with open(manifestPath) as manifestFile:
+            for entry in load(manifestFile):
+                if entry.get('bins'):
+                    for binPath in entry['bins']:
+                        self.addBin(entry['project'], binPath,
+                                    entry.get('output'))
+                else:
+                    self.addProject(entry['project'], entry.get('output'))
+
+    def run(self):
+        """
+        Drain the queue project by project, blocking until it is done
+        """
+        self.cancelled = False
+        for projectName, bins in self.projects.items():
+            if self.cancelled:
+                break
+            if not self.resolve.loadProject(projectName):
+                self.onEvent({
+                    'type': 'warning',
+                    'message': f'Project {projectName} not found'
+                })
+                continue
+            for binPath, folder, outputPath in self.__getBins(bins):
+                if self.cancelled:
+                    break
+                self.__processBin(projectName, binPath, folder, outputPath)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.engine:
+            self.engine.cancel()
+
+    def __getBins(self, bins):
+        """
+        Resolve the queued bin paths of the loaded project, without duplicates
+        """
+        seen = set()
+        for entry in bins:
+            if entry['binPath'] is None:
+                found = [(path, folder)
+                         for path, folder in self.resolve.walkFolders()]
+            else:
+                found = [(entry['binPath'],
+                          self.resolve.getFolderByPath(entry['binPath']))]
+            for binPath, folder in found:
+                if folder is None:
+                    self.onEvent({
+                        'type': 'warning',
+                        'message': f'Bin {binPath} not found'
+                    })
+                elif binPath not in seen:
+                    seen.add(binPath)
+                    yield binPath, folder, entry['outputPath']
+
+    def __processBin(self, projectName, binPath, folder, outputPath):
+        self.resolve.setCurrentFolder(folder)
+        clipsInFolder = self.resolve.getFolderContent()
+        if not clipsInFolder['videoClips'] or not clipsInFolder['audioClips']:
+            self.onEvent({
+                'type': 'binSkipped',
+                'project': projectName,
+                'bin': binPath
+            })
+            return
+
+        outputPath = outputPath or f'{self.outputPath}/{projectName}/{binPath}'
+        makedirs(outputPath, exist_ok=True)
+        self.onEvent({
+            'type': 'binStarted',
+            'project': projectName,
+            'bin': binPath,
+            'tracks': len(clipsInFolder['audioClips'])
+        })
+        self.engine = BatchEngine(self.resolve,
+                                  outputPath=outputPath.rstrip('/') + '/',
+                                  onEvent=self.onEvent,
+                                  **self.engineOptions)
+        self.engine.run()
+        self.engine = None
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        description='Process bins of several Resolve projects in one run')
+    parser.add_argument('--manifest', help='JSON manifest of the work')
+    parser.add_argument('--project',
+                        action='append',
+                        default=[],
+                        help='process every bin of this project, repeatable')
+    parser.add_argument('--output', required=True, help='output folder')
+    addEngineArguments(parser)
+    args = parser.parse_args(argv)
+
+    resolve = DaVinciResolve()
+    if args.final_preset:
+        resolve.RENDER_FINAL_PRESET = args.final_preset
+    if not resolve.connect():
+        for error in resolve.errorMessages:
+            print(error['message'])
+        return 1
+
+    queue = WorkQueue(resolve,
+                      outputPath=args.output,
+                      engineOptions=getEngineOptions(args),
+                      onEvent=printEvent)
+    if args.manifest:
+        queue.addManifest(args.manifest)
+    for projectName in args.project:
+        queue.addProject(projectName)
+    queue.run()
+
+    return 0
+
+
+if __name__ == '__main__':
+    configureScriptEnvironment()
+    sys.exit(main())